@@ -11,8 +11,10 @@ from datetime import datetime
 
 from app.models.report import DocumentRequest
 from app.services.report_service import DocumentProcessingService
+from app.services.admission import QueueFullError
 from app.repositories.report_repo import ReportRepository, OriginalFileRepository
 from app.core.config import config
+from app.core.scheduler import LANE_INTERACTIVE, scheduling_context
 from app.api.v1.dependencies import get_current_user
 
 
@@ -23,6 +25,23 @@ router = APIRouter(prefix="/api/v1", tags=["Documents"])
 processing_service = DocumentProcessingService()
 
 
+def discard_upload(document_id: str, file_path: str = None):
+  """Undo an upload whose processing could not be started"""
+  processing_service.cancel_document(document_id)
+  if file_path and os.path.exists(file_path):
+    os.remove(file_path)
+  OriginalFileRepository.delete(document_id)
+
+
+def queue_full(e: QueueFullError) -> HTTPException:
+  """429 telling the client when to try again"""
+  return HTTPException(
+    status_code=429,
+    detail=str(e),
+    headers={"Retry-After": str(e.retry_after)}
+  )
+
+
 @router.post("/process")
 async def process_document(
   file: UploadFile = File(...),
@@ -58,6 +77,8 @@ async def process_document(
       )
 
     content = await file.read()
+    await processing_service.check_admission(len(content))
+
     now = datetime.utcnow()
     year = str(now.year)
     month = now.strftime("%b").lower()
@@ -100,13 +121,20 @@ async def process_document(
 
     request = DocumentRequest(
       file_path=file_path,
+      file_content=content,
       file_type="pdf" if file_ext == "pdf" else "image"
     )
 
-    await processing_service.process_document(
-      request,
-      document_id
-    )
+    try:
+      with scheduling_context(current_user["id"], report.get("bank_name"), LANE_INTERACTIVE):
+        await processing_service.process_document(
+          request,
+          document_id,
+          admitted=True
+        )
+    except Exception:
+      discard_upload(document_id, file_path)
+      raise
 
     return {
       "success": True,
@@ -118,6 +146,8 @@ async def process_document(
       "file_path": file_path
     }
 
+  except QueueFullError as e:
+    raise queue_full(e)
   except HTTPException:
     raise
   except Exception as e:
@@ -194,55 +224,70 @@ async def process_multiple_documents(
           detail=f"Unsupported file type: {file.filename}"
         )
 
-      content = await file.read()
-      file_size_mb = len(content) / (1024 * 1024)
-
-      # Create DB record
-      file_doc = OriginalFileRepository.create(
-        report_id=report_id,
-        file_name=file.filename,
-        file_type=file_ext,
-        file_path=None,
-        created_by=current_user["id"],
-        file_size_mb=file_size_mb
-      )
-      document_id = file_doc["id"]
-
-      file_path = os.path.join(
-        upload_dir,
-        f"{document_id}.{file_ext}"
-      )
-
-      with open(file_path, "wb") as f:
-        f.write(content)
-
-      OriginalFileRepository.update_path(
-        document_id,
-        file_path,
-        current_user["id"]
-      )
+    # Admit the whole batch or none of it: the documents are not checked
+    # again one by one, and any that did start are undone on failure
+    contents = [await file.read() for file in files]
+    await processing_service.check_admission(sum(len(c) for c in contents), len(files))
+
+    try:
+      for file, content in zip(files, contents):
+        file_ext = file.filename.split(".")[-1].lower()
+        file_size_mb = len(content) / (1024 * 1024)
+
+        # Create DB record
+        file_doc = OriginalFileRepository.create(
+          report_id=report_id,
+          file_name=file.filename,
+          file_type=file_ext,
+          file_path=None,
+          created_by=current_user["id"],
+          file_size_mb=file_size_mb
+        )
+        document_id = file_doc["id"]
 
-      request = DocumentRequest(
-        file_path=file_path,
-        file_type="pdf" if file_ext == "pdf" else "image"
-      )
+        file_path = os.path.join(
+          upload_dir,
+          f"{document_id}.{file_ext}"
+        )
+        uploaded_documents.append({
+          "document_id": document_id,
+          "file_name": file.filename,
+          "file_path": file_path
+        })
+
+        with open(file_path, "wb") as f:
+          f.write(content)
+
+        OriginalFileRepository.update_path(
+          document_id,
+          file_path,
+          current_user["id"]
+        )
 
-      await processing_service.process_document(
-        request,
-        document_id
-      )
+        request = DocumentRequest(
+          file_path=file_path,
+          file_content=content,
+          file_type="pdf" if file_ext == "pdf" else "image"
+        )
 
-      uploaded_documents.append({
-        "document_id": document_id,
-        "file_name": file.filename,
-        "file_path": file_path
-      })
+        with scheduling_context(current_user["id"], report.get("bank_name"), LANE_INTERACTIVE):
+          await processing_service.process_document(
+            request,
+            document_id,
+            admitted=True
+          )
+    except Exception:
+      for document in uploaded_documents:
+        discard_upload(document["document_id"], document["file_path"])
+      raise
 
     return {
       "success": True,
       "documents": uploaded_documents
     }
 
+  except QueueFullError as e:
+    raise queue_full(e)
   except HTTPException:
     raise
   except Exception as e:
@@ -307,6 +352,61 @@ async def get_document_status(document_id: str):
     "status": "processing"
   }
 
+@router.post("/documents/{document_id}/resume")
+async def resume_document(
+  document_id: str,
+  current_user: dict = Depends(get_current_user)
+):
+  """Resume an interrupted, failed or partly processed document, redoing only pages not stored"""
+  file_doc = OriginalFileRepository.get_by_id(document_id)
+  if not file_doc:
+    raise HTTPException(
+      status_code=404,
+      detail="Document not found"
+    )
+
+  # Access check
+  if (
+    str(file_doc.get("created_by")) != current_user["id"]
+    and "admin" not in current_user.get("roles", [])
+  ):
+    raise HTTPException(
+      status_code=403,
+      detail="Access denied"
+    )
+
+  if file_doc.get("processing_status") not in ("processing", "queued", "partial", "failed"):
+    raise HTTPException(
+      status_code=409,
+      detail=f"Document is not resumable (status: {file_doc.get('processing_status')})"
+    )
+
+  file_path = file_doc.get("file_path")
+  if not file_path or not os.path.exists(file_path):
+    raise HTTPException(
+      status_code=404,
+      detail="Document file not found"
+    )
+
+  report = ReportRepository.get_by_id(file_doc["report_id"]) or {}
+  try:
+    with scheduling_context(current_user["id"], report.get("bank_name"), LANE_INTERACTIVE):
+      resumed = await processing_service.resume_document(document_id)
+  except QueueFullError as e:
+    raise queue_full(e)
+
+  if not resumed:
+    raise HTTPException(
+      status_code=409,
+      detail="Document is still being processed"
+    )
+
+  return {
+    "success": True,
+    "document_id": document_id,
+    "sse_endpoint": f"/api/v1/stream/{document_id}"
+  }
+
 @router.delete("/documents/{document_id}")
 async def delete_document(
   document_id: str,
@@ -9,9 +9,10 @@ from datetime import datetime
 from pydantic import BaseModel
 
 from app.models.report import DocumentRequest
-from app.services.report_service import DocumentProcessingService
+from app.services.report_service import DocumentProcessingService, PAGES_STORED_STATUSES
 from app.repositories.report_repo import ReportRepository, OriginalFileRepository
 from app.core.config import config
+from app.core.scheduler import LANE_BULK, LANE_INTERACTIVE, scheduling_context
 from app.api.v1.dependencies import get_current_user
 import os
 
@@ -100,7 +101,7 @@ async def import_report_files(
     current_user: dict = Depends(get_current_user),
 ):
     """
-    Import selected files: OCR + translate and store file_content
+    Import selected files: OCR + translate (or reuse stored pages) and store file_content
     """
 
     # Validate report
@@ -116,29 +117,34 @@ async def import_report_files(
 
     imported_files = []
 
-    for file_id in payload.file_ids:
-        file_doc = OriginalFileRepository.get_by_id(file_id)
-        if not file_doc:
-            continue
-
-        file_path = file_doc.get("file_path")
-        if not file_path or not os.path.exists(file_path):
-            continue
-
-        # OCR + translate
-        final_text = await processing_service.import_document(file_path)
-
-        # Save content
-        OriginalFileRepository.update_file_content(
-            file_id=file_id,
-            content=final_text,
-            updated_by=current_user["id"]
-        )
+    # Imports share OCR and the LLM with interactive uploads in the bulk lane
+    with scheduling_context(current_user["id"], report.get("bank_name"), LANE_BULK):
+        for file_id in payload.file_ids:
+            file_doc = OriginalFileRepository.get_by_id(file_id)
+            if not file_doc:
+                continue
+
+            # Processed documents are imported from their stored pages; others
+            # need the file on disk for OCR + translation
+            file_path = file_doc.get("file_path")
+            if file_doc.get("processing_status") not in PAGES_STORED_STATUSES and (
+                not file_path or not os.path.exists(file_path)
+            ):
+                continue
+
+            final_text = await processing_service.import_document(file_path, document_id=file_id)
+
+            # Save content
+            OriginalFileRepository.update_file_content(
+                file_id=file_id,
+                content=final_text,
+                updated_by=current_user["id"]
+            )
 
-        imported_files.append({
-            "file_id": file_id,
-            "file_name": file_doc.get("file_name")
-        })
+            imported_files.append({
+                "file_id": file_id,
+                "file_name": file_doc.get("file_name")
+            })
 
     return {
         "success": True,
@@ -194,7 +200,8 @@ async def analyze_and_summarize(
         merged_content = "\n\n".join(contents)
 
         # Analyze using LLM
-        summarized_content = llm_service.summarize(merged_content)
+        with scheduling_context(current_user["id"], report.get("bank_name"), LANE_INTERACTIVE):
+            summarized_content = await llm_service.summarize(merged_content)
 
         return {
             "id": report["id"],
@@ -0,0 +1,51 @@
+"""
+In-memory caching helpers shared by services
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+import threading
+
+
+class LRUCache:
+    """Thread-safe LRU cache evicting by total entry size rather than count"""
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = None):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: len(value.encode("utf-8")) if isinstance(value, str) else len(value))
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key: str, value: Any):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._total -= self._sizes.pop(key)
+                del self._entries[key]
+
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._total += size
+
+            while self._total > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._total -= self._sizes.pop(old_key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
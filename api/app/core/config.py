@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 import sys
+import tempfile
 
 load_dotenv()
 
@@ -8,11 +9,131 @@ class Config:
     # OpenAI
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    # Shared HTTP connection pool and per-call timeouts for OpenAI requests
+    OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 50))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20))
+    OPENAI_KEEPALIVE_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", 30))
+    OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", 120))
+    OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OPENAI_CONNECT_TIMEOUT_SECONDS", 10))
+    # Requests/tokens per minute shared by all workers on this host (0 disables a
+    # limit), the SQLite file that coordinates them, and retry/backoff on 429s
+    OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", 500))
+    OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", 200000))
+    OPENAI_RATE_LIMIT_DB = os.getenv(
+        "OPENAI_RATE_LIMIT_DB", os.path.join(tempfile.gettempdir(), "report_valuation_ratelimit.sqlite3")
+    )
+    OPENAI_EXPECTED_OUTPUT_TOKENS = int(os.getenv("OPENAI_EXPECTED_OUTPUT_TOKENS", 800))
+    OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 6))
+    OPENAI_BACKOFF_BASE_SECONDS = float(os.getenv("OPENAI_BACKOFF_BASE_SECONDS", 1))
+    OPENAI_BACKOFF_MAX_SECONDS = float(os.getenv("OPENAI_BACKOFF_MAX_SECONDS", 60))
+    # Pages of one document translated/simplified concurrently
+    PAGE_TRANSLATION_CONCURRENCY = int(os.getenv("PAGE_TRANSLATION_CONCURRENCY", 4))
+    # Completed pages are written to MongoDB in bulk every this many pages
+    PAGE_PERSIST_BATCH_SIZE = int(os.getenv("PAGE_PERSIST_BATCH_SIZE", 8))
+    # Documents being processed heart-beat every PROCESSING_HEARTBEAT_SECONDS; one
+    # silent for PROCESSING_STALE_SECONDS is resumed from its stored pages
+    PROCESSING_HEARTBEAT_SECONDS = int(os.getenv("PROCESSING_HEARTBEAT_SECONDS", 15))
+    PROCESSING_STALE_SECONDS = int(os.getenv("PROCESSING_STALE_SECONDS", 60))
+    RESUME_UNFINISHED_DOCUMENTS = os.getenv("RESUME_UNFINISHED_DOCUMENTS", "True").lower() == "true"
+    # Admission control: documents processed at once, pages between OCR and a
+    # stored result (all documents), and the bounded queue of waiting uploads
+    MAX_CONCURRENT_DOCUMENTS = int(os.getenv("MAX_CONCURRENT_DOCUMENTS", 4))
+    MAX_PAGES_IN_FLIGHT = int(os.getenv("MAX_PAGES_IN_FLIGHT", 48))
+    MAX_QUEUED_DOCUMENTS = int(os.getenv("MAX_QUEUED_DOCUMENTS", 50))
+    MAX_QUEUED_MB = int(os.getenv("MAX_QUEUED_MB", 500))
+    # Fair scheduling of OCR jobs and LLM requests across tenants (user + bank)
+    # and lanes (interactive uploads vs bulk imports). Weights are "name=weight"
+    # lists (tenant weights keyed by bank_name or user id); per-tenant caps
+    # limit the slots one tenant holds in a stage (0: no cap)
+    SCHEDULER_LANE_WEIGHTS = os.getenv("SCHEDULER_LANE_WEIGHTS", "interactive=4,bulk=1")
+    SCHEDULER_TENANT_WEIGHTS = os.getenv("SCHEDULER_TENANT_WEIGHTS", "")
+    TENANT_MAX_OCR_JOBS = int(os.getenv("TENANT_MAX_OCR_JOBS", 0))
+    LLM_MAX_CONCURRENT_REQUESTS = int(os.getenv("LLM_MAX_CONCURRENT_REQUESTS", 16))
+    TENANT_MAX_LLM_REQUESTS = int(os.getenv("TENANT_MAX_LLM_REQUESTS", 0))
+    # Durable job queue: the API only enqueues documents and `python -m app.worker`
+    # processes them (leases last PROCESSING_STALE_SECONDS, renewed every
+    # PROCESSING_HEARTBEAT_SECONDS). Failed jobs are retried with exponential
+    # backoff, then dead-lettered after JOB_MAX_ATTEMPTS.
+    JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "False").lower() == "true"
+    WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 2))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+    JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", 30))
+    JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", 900))
+    JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 1))
+    # How often API processes look for events published by workers
+    SSE_POLL_MS = int(os.getenv("SSE_POLL_MS", 250))
+    # How long a missing event number is waited for before it is skipped
+    SSE_GAP_WAIT_MS = int(os.getenv("SSE_GAP_WAIT_MS", 2000))
+    # "two_call": legal English, then a simple-English rewrite of it;
+    # "combined": both from one structured (JSON schema) response per page
+    TRANSLATION_MODE = os.getenv("TRANSLATION_MODE", "two_call")
+    # LLM result cache: in-memory LRU size, MongoDB persistence and entry lifetime
+    TRANSLATION_CACHE_MEMORY_MB = int(os.getenv("TRANSLATION_CACHE_MEMORY_MB", 32))
+    TRANSLATION_CACHE_PERSISTENT = os.getenv("TRANSLATION_CACHE_PERSISTENT", "True").lower() == "true"
+    TRANSLATION_CACHE_TTL_DAYS = int(os.getenv("TRANSLATION_CACHE_TTL_DAYS", 90))
+    # Clause-level translation memory: reuse stored translations of segments with
+    # identical normalized text and send only novel ones to the model
+    TRANSLATION_MEMORY_ENABLED = os.getenv("TRANSLATION_MEMORY_ENABLED", "False").lower() == "true"
+    TRANSLATION_MEMORY_MIN_SEGMENT_CHARS = int(os.getenv("TRANSLATION_MEMORY_MIN_SEGMENT_CHARS", 40))
+    TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", 50000))
+    # Token-budget request planning: pages under LLM_BATCH_SMALL_PAGE_TOKENS are
+    # packed into one request (up to LLM_BATCH_MAX_TOKENS / LLM_BATCH_MAX_PAGES,
+    # waiting at most LLM_BATCH_WAIT_MS for company); pages over
+    # LLM_MAX_PAGE_TOKENS are split into chunks
+    LLM_BATCH_ENABLED = os.getenv("LLM_BATCH_ENABLED", "True").lower() == "true"
+    LLM_BATCH_SMALL_PAGE_TOKENS = int(os.getenv("LLM_BATCH_SMALL_PAGE_TOKENS", 300))
+    LLM_BATCH_MAX_TOKENS = int(os.getenv("LLM_BATCH_MAX_TOKENS", 3000))
+    LLM_BATCH_MAX_PAGES = int(os.getenv("LLM_BATCH_MAX_PAGES", 8))
+    LLM_BATCH_WAIT_MS = int(os.getenv("LLM_BATCH_WAIT_MS", 200))
+    LLM_MAX_PAGE_TOKENS = int(os.getenv("LLM_MAX_PAGE_TOKENS", 6000))
+    # Document summaries: inputs above SUMMARY_MAX_INPUT_TOKENS are summarized
+    # map-reduce style in page groups of up to SUMMARY_GROUP_TOKENS
+    SUMMARY_MAX_INPUT_TOKENS = int(os.getenv("SUMMARY_MAX_INPUT_TOKENS", 12000))
+    SUMMARY_GROUP_TOKENS = int(os.getenv("SUMMARY_GROUP_TOKENS", 6000))
+    # Stream completions to clients as page_delta events, coalesced into chunks
+    # of LLM_STREAM_CHUNK_CHARS or whatever arrived within LLM_STREAM_FLUSH_MS
+    LLM_STREAMING = os.getenv("LLM_STREAMING", "True").lower() == "true"
+    LLM_STREAM_CHUNK_CHARS = int(os.getenv("LLM_STREAM_CHUNK_CHARS", 80))
+    LLM_STREAM_FLUSH_MS = int(os.getenv("LLM_STREAM_FLUSH_MS", 250))
     
     # Tesseract
     TESSERACT_LANG = os.getenv("TESSERACT_LANG", "tam")
     TESSERACT_PATH = os.getenv("TESSERACT_PATH")
     
+    # OCR
+    # Engine used by OCR workers: "pytesseract" (CLI per page) or "tesserocr" (resident)
+    OCR_BACKEND = os.getenv("OCR_BACKEND", "pytesseract")
+    # Worker processes in the shared OCR pool
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+    # Number of PDF pages of one document in flight at a time
+    OCR_PAGE_BATCH_SIZE = int(os.getenv("OCR_PAGE_BATCH_SIZE", OCR_WORKERS))
+    # Documents OCR'd concurrently; others wait for a free slot
+    MAX_CONCURRENT_OCR_JOBS = int(os.getenv("MAX_CONCURRENT_OCR_JOBS", 4))
+    # OCR result cache: in-memory LRU size, and whether to persist to MongoDB
+    OCR_CACHE_MEMORY_MB = int(os.getenv("OCR_CACHE_MEMORY_MB", 64))
+    OCR_CACHE_PERSISTENT = os.getenv("OCR_CACHE_PERSISTENT", "True").lower() == "true"
+    # Use a PDF page's embedded text instead of OCR when it passes sanity checks
+    OCR_USE_TEXT_LAYER = os.getenv("OCR_USE_TEXT_LAYER", "True").lower() == "true"
+    OCR_TEXT_LAYER_MIN_CHARS = int(os.getenv("OCR_TEXT_LAYER_MIN_CHARS", 50))
+    # Fraction of the page area the text layer's words must cover; pages with a
+    # small digital header over scanned content fall back to OCR
+    OCR_TEXT_LAYER_MIN_COVERAGE = float(os.getenv("OCR_TEXT_LAYER_MIN_COVERAGE", 0.05))
+    # Render resolution for OCR; with adaptive DPI, pages are first OCR'd at
+    # OCR_FAST_DPI and re-scanned at OCR_HIGH_DPI only below OCR_MIN_CONFIDENCE
+    OCR_HIGH_DPI = int(os.getenv("OCR_HIGH_DPI", 300))
+    OCR_ADAPTIVE_DPI = os.getenv("OCR_ADAPTIVE_DPI", "False").lower() == "true"
+    OCR_FAST_DPI = int(os.getenv("OCR_FAST_DPI", 150))
+    OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", 75))
+    # Image preprocessing before OCR: any of grayscale, downscale, deskew, crop, binarize
+    OCR_PREPROCESS_STEPS = [
+        step.strip() for step in os.getenv("OCR_PREPROCESS_STEPS", "grayscale").split(",") if step.strip()
+    ]
+    OCR_PREPROCESS_MAX_WIDTH = int(os.getenv("OCR_PREPROCESS_MAX_WIDTH", 2500))
+    # Pages with less ink than this fraction are treated as blank and skipped
+    OCR_BLANK_INK_THRESHOLD = float(os.getenv("OCR_BLANK_INK_THRESHOLD", 0.002))
+    # Files at least this large are memory-mapped instead of read into memory
+    OCR_MMAP_THRESHOLD_MB = int(os.getenv("OCR_MMAP_THRESHOLD_MB", 8))
+    
     # Server
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", 8000))
@@ -36,6 +157,9 @@ class Config:
         
         if not self.OPENAI_API_KEY:
             errors.append("OPENAI_API_KEY is required. Please set it in .env file")
+
+        if self.TRANSLATION_MODE not in ("two_call", "combined"):
+            errors.append("TRANSLATION_MODE must be 'two_call' or 'combined'")
         
         if errors:
             print("\n❌ Configuration Error:")
@@ -0,0 +1,208 @@
+"""
+Weighted fair scheduling of shared processing stages (OCR, LLM calls).
+
+Work is tagged with a tenant (user and bank) and a lane: "interactive" for
+single uploads someone is waiting on, "bulk" for report imports. Each
+(lane, tenant) flow is queued separately and slots are handed out in
+start-time fair queuing order, so a flow's share of a stage follows its
+weight (lane weight x tenant weight) however much work it has queued, and
+one tenant's 300-file import cannot starve another's single deed. Tenants
+can also be capped to a number of slots per stage. The document admission
+queue and the worker job queue order documents by the same tags.
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import time
+
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+
+
+class Tenant(NamedTuple):
+    user_id: str
+    bank_name: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.bank_name or '-'}:{self.user_id or '-'}"
+
+
+# Who the current task works for; copied into tasks it creates
+current_tenant: ContextVar[Tenant] = ContextVar("current_tenant", default=Tenant(""))
+current_lane: ContextVar[str] = ContextVar("current_lane", default=LANE_INTERACTIVE)
+
+
+@contextmanager
+def scheduling_context(user_id: str, bank_name: Optional[str], lane: str):
+    """Attribute the work done inside the block (and tasks started in it)"""
+    tenant_token = current_tenant.set(Tenant(user_id or "", bank_name))
+    lane_token = current_lane.set(lane)
+    try:
+        yield
+    finally:
+        current_lane.reset(lane_token)
+        current_tenant.reset(tenant_token)
+
+
+def parse_weights(value: str) -> Dict[str, float]:
+    """Parse "name=weight,name=weight" settings"""
+    weights = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() and weight.strip():
+            weights[name.strip()] = float(weight)
+    return weights
+
+
+class _Waiter:
+    __slots__ = ("lane", "tenant_key", "future", "queued_at")
+
+    def __init__(self, lane: str, tenant_key: str, future: asyncio.Future):
+        self.lane = lane
+        self.tenant_key = tenant_key
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class FairOrder:
+    """
+    Start-time fair queuing tags. Work is served in order of its start tag,
+    which gives each (lane, tenant) flow its weighted share of a stage.
+    """
+
+    def __init__(self, lane_weights: Dict[str, float], tenant_weights: Dict[str, float]):
+        self.lane_weights = lane_weights
+        self.tenant_weights = tenant_weights
+        # Virtual time, and the virtual finish tag of each flow's last request
+        self.virtual_time = 0.0
+        self.finish_tags: Dict[Tuple[str, str], float] = {}
+
+    def weight(self, lane: str, tenant: Tenant) -> float:
+        tenant_weight = self.tenant_weights.get(tenant.bank_name or "", self.tenant_weights.get(tenant.user_id, 1.0))
+        return max(self.lane_weights.get(lane, 1.0) * tenant_weight, 1e-6)
+
+    def start_tag(self, lane: str, tenant: Tenant, cost: float = 1.0) -> float:
+        """Tag a new request of the flow; requests are served lowest tag first"""
+        flow = (lane, tenant.key)
+        start = max(self.virtual_time, self.finish_tags.get(flow, 0.0))
+        self.finish_tags[flow] = start + cost / self.weight(lane, tenant)
+        return start
+
+    def started(self, start: float):
+        """Advance virtual time to the tag of the request being served"""
+        self.virtual_time = max(self.virtual_time, start)
+
+        # Idle flows are back in step with virtual time; forget them
+        if len(self.finish_tags) > 10000:
+            self.finish_tags = {f: t for f, t in self.finish_tags.items() if t > self.virtual_time}
+
+
+class FairScheduler(FairOrder):
+    def __init__(
+        self,
+        name: str,
+        capacity: int,
+        lane_weights: Dict[str, float],
+        tenant_weights: Dict[str, float],
+        tenant_limit: int = 0
+    ):
+        super().__init__(lane_weights, tenant_weights)
+        self.name = name
+        self.capacity = max(1, capacity)
+        # Slots one tenant may hold at once (0: no cap)
+        self.tenant_limit = tenant_limit
+
+        self.in_use = 0
+        self.tenant_in_use: Dict[str, int] = {}
+        self._queue: List[Tuple[float, int, _Waiter]] = []
+        self._sequence = itertools.count()
+
+        # Recent queue waits (seconds) per lane
+        self.waits: Dict[str, Deque[float]] = {}
+        self.counters: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def slot(self, cost: float = 1.0):
+        """Hold one slot of the stage for the current tenant and lane"""
+        tenant_key = await self.acquire(cost)
+        try:
+            yield
+        finally:
+            self.release(tenant_key)
+
+    async def acquire(self, cost: float = 1.0) -> str:
+        """Take a slot for the current tenant and lane; returns the key to release it with"""
+        tenant, lane = current_tenant.get(), current_lane.get()
+        await self._acquire(tenant, lane, cost)
+        return tenant.key
+
+    async def _acquire(self, tenant: Tenant, lane: str, cost: float):
+        start = self.start_tag(lane, tenant, cost)
+        waiter = _Waiter(lane, tenant.key, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._queue, (start, next(self._sequence), waiter))
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller gave up
+                self.release(tenant.key)
+            raise
+
+    def release(self, tenant_key: str):
+        self.in_use -= 1
+        self.tenant_in_use[tenant_key] -= 1
+        if not self.tenant_in_use[tenant_key]:
+            del self.tenant_in_use[tenant_key]
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant free slots in virtual start order, skipping capped tenants"""
+        skipped = []
+        while self._queue and self.in_use < self.capacity:
+            start, sequence, waiter = heapq.heappop(self._queue)
+            if waiter.future.done():
+                continue
+            if self.tenant_limit and self.tenant_in_use.get(waiter.tenant_key, 0) >= self.tenant_limit:
+                skipped.append((start, sequence, waiter))
+                continue
+
+            self.started(start)
+            self.in_use += 1
+            self.tenant_in_use[waiter.tenant_key] = self.tenant_in_use.get(waiter.tenant_key, 0) + 1
+            self.waits.setdefault(waiter.lane, deque(maxlen=1000)).append(time.monotonic() - waiter.queued_at)
+            self.counters[waiter.lane] = self.counters.get(waiter.lane, 0) + 1
+            waiter.future.set_result(None)
+
+        for item in skipped:
+            heapq.heappush(self._queue, item)
+
+    def stats(self) -> Dict[str, object]:
+        waiting: Dict[str, int] = {}
+        for _, _, waiter in self._queue:
+            if not waiter.future.done():
+                waiting[waiter.lane] = waiting.get(waiter.lane, 0) + 1
+
+        lanes = {}
+        for lane in sorted(set(self.waits) | set(waiting)):
+            waits = sorted(self.waits.get(lane, ()))
+            lanes[lane] = {
+                "granted": self.counters.get(lane, 0),
+                "waiting": waiting.get(lane, 0),
+                "avg_wait_ms": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95_wait_ms": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0,
+                "max_wait_ms": round(1000 * waits[-1], 1) if waits else 0.0
+            }
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "tenants_active": len(self.tenant_in_use),
+            "lanes": lanes
+        }
@@ -0,0 +1,64 @@
+"""
+In-flight call coalescing: concurrent callers asking for the same key
+share the first caller's result instead of repeating the work.
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.counters = {"calls": 0, "coalesced": 0}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    def lead(self, key: str) -> asyncio.Future:
+        """Register the caller as the one doing the work for `key`"""
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.counters["calls"] += 1
+        return future
+
+    def resolve(self, key: str, result: Any):
+        future = self._calls.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def reject(self, key: str, error: BaseException):
+        future = self._calls.pop(key, None)
+        if future is None or future.done():
+            return
+        if isinstance(error, Exception):
+            future.set_exception(error)
+            # Waiters re-raise it; an unwaited future should not log it again
+            future.exception()
+        else:
+            # The leader was cancelled; waiters retry on their own
+            future.cancel()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn(), or wait for the identical call already in flight"""
+        while key in self._calls:
+            future = self._calls[key]
+            self.counters["coalesced"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                self.counters["coalesced"] -= 1
+
+        self.lead(key)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.reject(key, e)
+            raise
+        self.resolve(key, result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "in_flight": len(self._calls)}
@@ -24,9 +24,38 @@ reports = db["reports"]
 original_files = db["original_files"]
 ai_extracted_content = db["ai_extracted_content"]
 final_reports = db["final_reports"]
+# Per-page pipeline results (OCR text, legal/simple English) by document
+document_pages = db["document_pages"]
+
+# Processing caches
+ocr_cache = db["ocr_cache"]
+translation_cache = db["translation_cache"]
+translation_memory = db["translation_memory"]
+
+# Document processing jobs (claimed by worker processes) and the progress
+# events workers publish for the API's SSE streams
+processing_jobs = db["processing_jobs"]
+processing_events = db["processing_events"]
+# Per-document event counters: every writer numbers its events from the same sequence
+processing_event_sequences = db["processing_event_sequences"]
+# Fair queuing state of the job queue: the virtual time and each (lane,
+# tenant) flow's last finish tag
+processing_job_flows = db["processing_job_flows"]
 
 # Legacy collection names (for backward compatibility)
 og_files = db["original_files"]
 ai_contents = db["ai_extracted_content"]
 
 print(f"MongoDB connected to DB: {DB_NAME}")
+
+
+def ensure_indexes():
+    """
+    Create the indexes the processing pipeline queries by. Idempotent; run
+    at API startup and when a worker starts, not on import.
+    """
+    document_pages.create_index([("document_id", 1), ("page_number", 1)])
+    processing_jobs.create_index([("status", 1), ("available_at", 1)])
+    processing_jobs.create_index([("status", 1), ("fair_tag", 1)])
+    processing_events.create_index([("document_id", 1), ("seq", 1)], unique=True)
+    processing_events.create_index("created_at", expireAfterSeconds=24 * 3600)
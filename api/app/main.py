@@ -1,12 +1,20 @@
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
 
 from app.core.config import config
+from app.db.session import ensure_indexes
 from app.api.v1.auth import router as auth_router
-from app.api.v1.documents import router as documents_router
+from app.api.v1.documents import router as documents_router, processing_service
 from app.api.v1.reports import router as reports_router
+from app.services.ocr_worker import shutdown_ocr_executor
+from app.services.admission import admission_controller
+from app.services.ocr_service import ocr_scheduler
+from app.services.openai_client import close_openai_clients, llm_scheduler, llm_singleflight
+from app.services.translation_cache import translation_cache
+from app.services.translation_memory import translation_memory
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +49,29 @@ app.add_middleware(
 )
 
 
+# Background task resuming documents abandoned by a crashed process
+_resume_task = None
+
+
+@app.on_event("startup")
+async def startup():
+    """Create database indexes and pick up documents whose processing was interrupted"""
+    global _resume_task
+    await asyncio.to_thread(ensure_indexes)
+    # With the job queue, workers take over expired leases instead
+    if config.RESUME_UNFINISHED_DOCUMENTS and not config.JOB_QUEUE_ENABLED:
+        _resume_task = asyncio.create_task(processing_service.run_resume_loop())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release shared processing resources"""
+    if _resume_task is not None:
+        _resume_task.cancel()
+    shutdown_ocr_executor()
+    await close_openai_clients()
+
+
 @app.get("/")
 async def root():
     return {
@@ -75,6 +106,21 @@ async def health_check():
     return health_status
 
 
+@app.get("/metrics")
+async def metrics():
+    """Processing cache, LLM request, admission and scheduling counters"""
+    return {
+        "translation_cache": translation_cache.stats(),
+        "translation_memory": translation_memory.stats(),
+        "llm_singleflight": llm_singleflight.stats(),
+        "admission": admission_controller.stats(),
+        "scheduler": {
+            "ocr": ocr_scheduler.stats(),
+            "llm": llm_scheduler.stats()
+        }
+    }
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
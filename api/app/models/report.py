@@ -14,6 +14,7 @@ from enum import Enum
 
 class ProcessingStatus(str, Enum):
     UPLOADED = "uploaded"
+    QUEUED = "queued"
     OCR_STARTED = "ocr_started"
     OCR_COMPLETED = "ocr_completed"
     TRANSLATION_STARTED = "translation_started"
@@ -21,6 +22,8 @@ class ProcessingStatus(str, Enum):
     SIMPLIFICATION_STARTED = "simplification_started"
     SIMPLIFICATION_COMPLETED = "simplification_completed"
     COMPLETED = "completed"
+    # Finished, but some pages failed and were not stored
+    PARTIAL = "partial"
     FAILED = "failed"
 
 
@@ -114,9 +117,17 @@ class PageData(BaseModel):
     original_text: Optional[str] = None
     legal_english: Optional[str] = None
     simple_english: Optional[str] = None
+    extraction_method: Optional[Literal["text_layer", "ocr", "blank", "duplicate"]] = None
+    image_hash: Optional[str] = None
     status: ProcessingStatus = ProcessingStatus.UPLOADED
 
 
+class PageTranslation(BaseModel):
+    """Structured reply of the combined translate+simplify call"""
+    legal_english: str = Field(..., min_length=1)
+    simple_english: str = Field(..., min_length=1)
+
+
 class DocumentRequest(BaseModel):
     file_path: Optional[str] = None
     file_content: Optional[bytes] = None
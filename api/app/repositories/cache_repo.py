@@ -0,0 +1,76 @@
+"""
+Cache repository - persistent tier for processing caches
+"""
+
+from datetime import datetime
+from typing import List, Optional
+from app.db.session import ocr_cache, translation_cache, translation_memory
+
+
+class OCRCacheRepository:
+
+    @staticmethod
+    def get(key: str) -> Optional[dict]:
+        """Get a cached OCR page result"""
+        return ocr_cache.find_one({"_id": key})
+
+    @staticmethod
+    def set(key: str, page: dict) -> None:
+        """Store an OCR page result"""
+        ocr_cache.update_one(
+            {"_id": key},
+            {"$set": {
+                "page": page,
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+
+class TranslationCacheRepository:
+
+    @staticmethod
+    def ensure_indexes(ttl_seconds: int) -> None:
+        """Expire entries ttl_seconds after they were written"""
+        translation_cache.create_index("created_at", expireAfterSeconds=ttl_seconds)
+
+    @staticmethod
+    def get(key: str) -> Optional[dict]:
+        """Get a cached LLM output"""
+        return translation_cache.find_one({"_id": key})
+
+    @staticmethod
+    def set(key: str, kind: str, output: str) -> None:
+        """Store an LLM output"""
+        translation_cache.update_one(
+            {"_id": key},
+            {"$set": {
+                "kind": kind,
+                "output": output,
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+
+class TranslationMemoryRepository:
+
+    @staticmethod
+    def get_recent(limit: int) -> List[dict]:
+        """Most recently stored segments, oldest first"""
+        docs = list(translation_memory.find().sort("created_at", -1).limit(limit))
+        return docs[::-1]
+
+    @staticmethod
+    def add(segment_id: str, source: str, translation: str, model: str) -> None:
+        """Store a translated segment"""
+        translation_memory.update_one(
+            {"_id": segment_id},
+            {"$set": {
+                "source": source,
+                "translation": translation,
+                "model": model,
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
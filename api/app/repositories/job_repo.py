@@ -0,0 +1,224 @@
+"""
+Job repository - durable document processing queue and progress events
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.scheduler import Tenant
+from app.db.session import processing_jobs, processing_events, processing_event_sequences, processing_job_flows
+
+# Job states; "dead" jobs exhausted their attempts and wait for a manual retry
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_DEAD = "dead"
+
+# processing_job_flows entry holding the job queue's virtual time
+VIRTUAL_TIME = "virtual_time"
+
+
+class JobRepository:
+
+    @staticmethod
+    def enqueue(
+        document_id: str,
+        file_path: str,
+        file_type: str,
+        resume: bool = False,
+        scheduling: Optional[dict] = None,
+        weight: float = 1.0
+    ) -> bool:
+        """
+        Queue a document for processing. `scheduling` (user_id, bank_name,
+        lane) attributes the work for fair scheduling in the worker, and
+        with `weight` (its flow's share) orders the queue. Returns False
+        when a job for it is already queued or running.
+        """
+        now = datetime.utcnow()
+        scheduling = scheduling or {}
+        try:
+            processing_jobs.update_one(
+                {"_id": document_id, "status": {"$nin": [JOB_QUEUED, JOB_RUNNING]}},
+                {"$set": {
+                    "file_path": file_path,
+                    "file_type": file_type,
+                    "resume": resume,
+                    "scheduling": scheduling,
+                    # Until its own tag is allocated below, the job waits at
+                    # the current virtual time
+                    "fair_tag": JobRepository._virtual_time(),
+                    "status": JOB_QUEUED,
+                    "attempts": 0,
+                    "available_at": now,
+                    "lease_until": None,
+                    "worker_id": None,
+                    "last_error": None,
+                    "created_at": now,
+                    "updated_at": now
+                }},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The filter missed because the existing job is still active
+            return False
+
+        # Only a job that was actually queued takes its turn of the flow
+        processing_jobs.update_one(
+            {"_id": document_id},
+            {"$set": {"fair_tag": JobRepository._fair_tag(scheduling, weight)}}
+        )
+
+        # Streams replay the current run only
+        processing_events.delete_many({"document_id": document_id})
+        return True
+
+    @staticmethod
+    def _virtual_time() -> float:
+        """Fair tag of the last job claimed from the queue"""
+        state = processing_job_flows.find_one({"_id": VIRTUAL_TIME}) or {}
+        return state.get("tag", 0.0)
+
+    @staticmethod
+    def _fair_tag(scheduling: dict, weight: float) -> float:
+        """
+        Start tag of a new job, as FairOrder.start_tag computes it in memory:
+        the later of the virtual time and its flow's last finish tag. The
+        flow's finish tag is advanced atomically, so API processes
+        enqueueing at once each get their own tag.
+        """
+        virtual_time = JobRepository._virtual_time()
+        tenant = Tenant(scheduling.get("user_id") or "", scheduling.get("bank_name"))
+        cost = 1.0 / max(weight, 1e-6)
+        flow = processing_job_flows.find_one_and_update(
+            {"_id": f"{scheduling.get('lane')}|{tenant.key}"},
+            [{"$set": {"tag": {"$add": [{"$max": [virtual_time, {"$ifNull": ["$tag", 0.0]}]}, cost]}}}],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return flow["tag"] - cost
+
+    @staticmethod
+    def count_queued() -> int:
+        return processing_jobs.count_documents({"status": JOB_QUEUED})
+
+    @staticmethod
+    def claim(worker_id: str, lease_seconds: int) -> Optional[dict]:
+        """
+        Atomically lease the next due job: a queued one, or a running one
+        whose worker let its lease expire. Jobs are taken in fair tag order,
+        so tenants and lanes share the workers by weight.
+        """
+        now = datetime.utcnow()
+        job = processing_jobs.find_one_and_update(
+            {"$or": [
+                {"status": JOB_QUEUED, "available_at": {"$lte": now}},
+                {"status": JOB_RUNNING, "lease_until": {"$lt": now}}
+            ]},
+            {
+                "$set": {
+                    "status": JOB_RUNNING,
+                    "worker_id": worker_id,
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("fair_tag", 1), ("available_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job and job.get("fair_tag") is not None:
+            processing_job_flows.update_one(
+                {"_id": VIRTUAL_TIME},
+                {"$max": {"tag": job["fair_tag"]}},
+                upsert=True
+            )
+        return job
+
+    @staticmethod
+    def renew(document_id: str, worker_id: str, lease_seconds: int) -> bool:
+        """Extend a lease; False means the job was taken over by another worker"""
+        now = datetime.utcnow()
+        result = processing_jobs.update_one(
+            {"_id": document_id, "status": JOB_RUNNING, "worker_id": worker_id},
+            {"$set": {
+                "lease_until": now + timedelta(seconds=lease_seconds),
+                "updated_at": now
+            }}
+        )
+        return result.matched_count > 0
+
+    @staticmethod
+    def complete(document_id: str, worker_id: str) -> None:
+        processing_jobs.update_one(
+            {"_id": document_id, "worker_id": worker_id},
+            {"$set": {
+                "status": JOB_COMPLETED,
+                "lease_until": None,
+                "updated_at": datetime.utcnow()
+            }}
+        )
+
+    @staticmethod
+    def fail(document_id: str, worker_id: str, error: str, retry_at: Optional[datetime]) -> None:
+        """Requeue a failed job at `retry_at`, or dead-letter it when None"""
+        fields = {
+            "status": JOB_QUEUED if retry_at else JOB_DEAD,
+            "last_error": error,
+            "lease_until": None,
+            "updated_at": datetime.utcnow()
+        }
+        if retry_at:
+            fields["available_at"] = retry_at
+            # Later attempts continue from the pages already stored
+            fields["resume"] = True
+        processing_jobs.update_one(
+            {"_id": document_id, "worker_id": worker_id},
+            {"$set": fields}
+        )
+
+    @staticmethod
+    def get(document_id: str) -> Optional[dict]:
+        return processing_jobs.find_one({"_id": document_id})
+
+
+class ProcessingEventRepository:
+
+    @staticmethod
+    def add(document_id: str, event: str) -> int:
+        """
+        Store a formatted SSE event for the API processes to relay. Events
+        are numbered from one counter per document, so the order is the same
+        whichever process (API, worker, a worker taking over) writes them.
+        Returns the event's sequence number.
+        """
+        for attempt in range(2):
+            try:
+                seq = processing_event_sequences.find_one_and_update(
+                    {"_id": document_id},
+                    {"$inc": {"seq": 1}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )["seq"]
+                break
+            except DuplicateKeyError:
+                # Two writers created the counter at once; the loser increments it
+                if attempt:
+                    raise
+        processing_events.insert_one({
+            "document_id": document_id,
+            "seq": seq,
+            "event": event,
+            "created_at": datetime.utcnow()
+        })
+        return seq
+
+    @staticmethod
+    def get_after(document_id: str, after_seq: int = 0, limit: int = 500) -> List[dict]:
+        """Events of a document numbered after `after_seq`, in sequence order"""
+        return list(
+            processing_events.find({"document_id": document_id, "seq": {"$gt": after_seq}})
+            .sort("seq", 1)
+            .limit(limit)
+        )
@@ -5,7 +5,16 @@ Report repository - database operations for reports
 from datetime import datetime
 from typing import Optional, List
 from bson import ObjectId
-from app.db.session import db, reports, original_files, ai_extracted_content, final_reports
+from pymongo import UpdateOne
+from app.db.session import (
+    db, reports, original_files, ai_extracted_content, final_reports, document_pages,
+    processing_jobs, processing_events
+)
+from app.models.report import PageData
+
+# Statuses of documents a process holds (running or queued in its memory);
+# they carry a heartbeat, and are resumed once it goes stale
+OWNED_STATUSES = ["processing", "queued"]
 
 
 class ReportRepository:
@@ -93,6 +102,7 @@ class ReportRepository:
         oid = ObjectId(report_id)
         # Delete related data
         original_files.delete_many({"report_id": oid})
+        document_pages.delete_many({"report_id": oid})
         ai_extracted_content.delete_many({"report_id": oid})
         final_reports.delete_many({"report_id": oid})
         # Delete report
@@ -163,6 +173,9 @@ class OriginalFileRepository:
             result = original_files.delete_one(
             {"_id": ObjectId(file_id)}
             )
+            document_pages.delete_many({"document_id": ObjectId(file_id)})
+            processing_jobs.delete_one({"_id": file_id})
+            processing_events.delete_many({"document_id": file_id})
             return result.deleted_count > 0
         except:
             return False
@@ -180,4 +193,130 @@ class OriginalFileRepository:
         return result.modified_count > 0
 
   
-        
\ No newline at end of file
+        
+
+    @staticmethod
+    def update_processing(
+        file_id: str,
+        status: str,
+        page_count: int = None,
+        summary: str = None,
+        stage: str = None,
+        failed_pages: List[int] = None
+    ) -> bool:
+        """
+        Record pipeline progress: status and stage, and page count / summary /
+        pages that failed once known
+        """
+        fields = {
+            "processing_status": status,
+            "updated_at": datetime.utcnow()
+        }
+        # Only a document being processed (or queued) has a heartbeat; once
+        # it stops, resuming it must not wait for the heartbeat to go stale
+        update = {"$set": fields}
+        if status in OWNED_STATUSES:
+            fields["heartbeat_at"] = fields["updated_at"]
+        else:
+            update["$unset"] = {"heartbeat_at": ""}
+        if page_count is not None:
+            fields["page_count"] = page_count
+        if summary is not None:
+            fields["summary"] = summary
+        if stage is not None:
+            fields["processing_stage"] = stage
+        if failed_pages is not None:
+            fields["failed_pages"] = failed_pages
+        result = original_files.update_one({"_id": ObjectId(file_id)}, update)
+        return result.modified_count > 0
+
+    @staticmethod
+    def heartbeat(file_id: str) -> None:
+        """Mark a document as actively being processed or queued (unless it has already finished)"""
+        original_files.update_one(
+            {"_id": ObjectId(file_id), "processing_status": {"$in": OWNED_STATUSES}},
+            {"$set": {"heartbeat_at": datetime.utcnow()}}
+        )
+
+    @staticmethod
+    def claim_stale(stale_before: datetime) -> Optional[dict]:
+        """
+        Atomically take over one document left 'processing' or 'queued' by a
+        process that stopped heart-beating before `stale_before` (or never
+        wrote a heartbeat, e.g. records from before heartbeats existed).
+        """
+        file = original_files.find_one_and_update(
+            {
+                "processing_status": {"$in": OWNED_STATUSES},
+                "$or": [
+                    {"heartbeat_at": {"$lt": stale_before}},
+                    {"heartbeat_at": {"$exists": False}}
+                ]
+            },
+            {"$set": {"heartbeat_at": datetime.utcnow()}}
+        )
+        if file:
+            file["id"] = str(file["_id"])
+            file["report_id"] = str(file["report_id"])
+        return file
+
+    @staticmethod
+    def claim(file_id: str, stale_before: datetime) -> bool:
+        """Atomically take over an unfinished document nobody is processing"""
+        result = original_files.update_one(
+            {
+                "_id": ObjectId(file_id),
+                "processing_status": {"$in": ["processing", "queued", "partial", "failed"]},
+                "$or": [
+                    {"heartbeat_at": {"$lt": stale_before}},
+                    {"heartbeat_at": {"$exists": False}}
+                ]
+            },
+            {"$set": {"heartbeat_at": datetime.utcnow()}}
+        )
+        return result.modified_count > 0
+
+
+class DocumentPageRepository:
+
+    @staticmethod
+    def bulk_upsert(document_id: str, report_id: str, pages: List[PageData]) -> None:
+        """Insert or replace processed pages in one round trip"""
+        if not pages:
+            return
+        now = datetime.utcnow()
+        document_pages.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": f"{document_id}:{page.page_number}"},
+                    {"$set": {
+                        "document_id": ObjectId(document_id),
+                        "report_id": ObjectId(report_id),
+                        **page.model_dump(mode="json", exclude_none=True),
+                        "updated_at": now
+                    }},
+                    upsert=True
+                )
+                for page in pages
+            ],
+            ordered=False
+        )
+
+    @staticmethod
+    def get_by_document(document_id: str) -> List[PageData]:
+        """Stored pages of a document, in page order"""
+        return [
+            PageData.model_validate(doc)
+            for doc in document_pages.find(
+                {"document_id": ObjectId(document_id)},
+                {"_id": 0, "document_id": 0, "report_id": 0, "updated_at": 0}
+            ).sort("page_number", 1)
+        ]
+
+    @staticmethod
+    def delete_after(document_id: str, page_count: int) -> None:
+        """Drop pages left over from an earlier, longer version of the document"""
+        document_pages.delete_many({
+            "document_id": ObjectId(document_id),
+            "page_number": {"$gt": page_count}
+        })
@@ -0,0 +1,183 @@
+"""
+Admission control for document processing.
+
+At most MAX_CONCURRENT_DOCUMENTS documents run at once and at most
+MAX_PAGES_IN_FLIGHT pages (across all documents) are between OCR and a
+stored result. Further documents wait in a bounded queue, limited by
+count and by the bytes of the uploads it holds in memory; beyond that new
+uploads are refused with a Retry-After estimate, so a burst makes a few
+documents finish fast instead of every document slow. Waiting documents
+are admitted in weighted fair order between tenants and lanes (see
+app.core.scheduler), not first come first served.
+"""
+
+from typing import Awaitable, Callable, Dict, Optional, Set
+import asyncio
+import itertools
+import math
+import time
+
+from app.core.config import config
+from app.core.scheduler import FairOrder, current_lane, current_tenant, parse_weights
+
+
+class QueueFullError(Exception):
+    """Raised when a document cannot even be queued"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    def __init__(self, document_id: str, size_bytes: int, start: float = 0.0, sequence: int = 0):
+        self.document_id = document_id
+        self.size_bytes = size_bytes
+        # Fair queuing order: start tag, then arrival
+        self.start = start
+        self.sequence = sequence
+        self.admitted = False
+        self.queued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        # Set when the ticket is admitted or moves up the queue
+        self.changed = asyncio.Event()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_documents: int,
+        max_pages: int,
+        max_queued_documents: int,
+        max_queued_bytes: int,
+        lane_weights: Optional[Dict[str, float]] = None,
+        tenant_weights: Optional[Dict[str, float]] = None
+    ):
+        self.max_documents = max(1, max_documents)
+        self.max_queued_documents = max_queued_documents
+        self.max_queued_bytes = max_queued_bytes
+
+        self.running: Set[str] = set()
+        self.waiting: Dict[str, Ticket] = {}
+        self.queued_bytes = 0
+        # Each document costs one unit of its (lane, tenant) flow
+        self.order = FairOrder(lane_weights or {}, tenant_weights or {})
+        self._sequence = itertools.count()
+
+        self._page_slots = asyncio.Semaphore(max(1, max_pages))
+        self.pages_in_flight = 0
+
+        # Moving average of processing time, for Retry-After and wait estimates
+        self.average_seconds = 60.0
+        self.counters = {"admitted": 0, "queued": 0, "rejected": 0}
+
+    def estimated_wait(self, position: int) -> int:
+        """Seconds until the document at `position` (1-based) in the queue starts"""
+        return math.ceil(self.average_seconds * math.ceil(position / self.max_documents))
+
+    def check(self, size_bytes: int, count: int = 1):
+        """Raise QueueFullError unless `count` more documents can be accepted"""
+        queued_after = len(self.running) + len(self.waiting) + count - self.max_documents
+        if queued_after <= 0:
+            return
+
+        reason = None
+        if queued_after > self.max_queued_documents:
+            reason = "Processing queue is full"
+        elif self.queued_bytes + size_bytes > self.max_queued_bytes:
+            reason = "Processing queue is out of memory for uploads"
+
+        if reason:
+            self.counters["rejected"] += count
+            raise QueueFullError(reason, self.estimated_wait(len(self.waiting) + 1))
+
+    def reserve(self, document_id: str, size_bytes: int, checked: bool = False) -> Ticket:
+        """
+        Admit a document, or queue it; raises QueueFullError when neither is
+        possible. `checked` skips the check for a batch admitted as a whole.
+        """
+        if not checked:
+            self.check(size_bytes)
+
+        start = self.order.start_tag(current_lane.get(), current_tenant.get())
+        ticket = Ticket(document_id, size_bytes, start, next(self._sequence))
+        if not self.waiting and len(self.running) < self.max_documents:
+            self._admit(ticket)
+        else:
+            self.waiting[document_id] = ticket
+            self.queued_bytes += size_bytes
+            self.counters["queued"] += 1
+        return ticket
+
+    def position(self, ticket: Ticket) -> int:
+        """1-based position of a waiting ticket (0 once admitted)"""
+        if ticket.admitted or ticket.document_id not in self.waiting:
+            return 0
+        return 1 + sum(
+            (waiting.start, waiting.sequence) < (ticket.start, ticket.sequence)
+            for waiting in self.waiting.values()
+        )
+
+    async def wait(self, ticket: Ticket, on_position: Callable[[int], Awaitable[None]] = None):
+        """Wait until `ticket` is admitted, reporting each new queue position"""
+        while not ticket.admitted:
+            ticket.changed.clear()
+            if on_position is not None:
+                await on_position(self.position(ticket))
+            if not ticket.admitted:
+                await ticket.changed.wait()
+
+    def release(self, ticket: Ticket):
+        """Give back a ticket's document slot (or its queue place) and admit the next"""
+        if ticket.admitted:
+            self.running.discard(ticket.document_id)
+            elapsed = time.monotonic() - ticket.started_at
+            self.average_seconds = 0.8 * self.average_seconds + 0.2 * elapsed
+        elif self.waiting.pop(ticket.document_id, None) is not None:
+            self.queued_bytes -= ticket.size_bytes
+
+        while self.waiting and len(self.running) < self.max_documents:
+            head = min(self.waiting.values(), key=lambda t: (t.start, t.sequence))
+            del self.waiting[head.document_id]
+            self.queued_bytes -= head.size_bytes
+            self._admit(head)
+        for waiting in self.waiting.values():
+            waiting.changed.set()
+
+    def _admit(self, ticket: Ticket):
+        self.order.started(ticket.start)
+        ticket.admitted = True
+        ticket.started_at = time.monotonic()
+        self.running.add(ticket.document_id)
+        self.counters["admitted"] += 1
+        ticket.changed.set()
+
+    async def acquire_page(self):
+        """Wait for room for one more page in flight"""
+        await self._page_slots.acquire()
+        self.pages_in_flight += 1
+
+    def release_page(self, *_):
+        self.pages_in_flight -= 1
+        self._page_slots.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **self.counters,
+            "running": len(self.running),
+            "waiting": len(self.waiting),
+            "queued_mb": round(self.queued_bytes / (1024 * 1024), 2),
+            "pages_in_flight": self.pages_in_flight,
+            "average_document_seconds": round(self.average_seconds, 1)
+        }
+
+
+# Shared by every DocumentProcessingService in this process
+admission_controller = AdmissionController(
+    max_documents=config.MAX_CONCURRENT_DOCUMENTS,
+    max_pages=config.MAX_PAGES_IN_FLIGHT,
+    max_queued_documents=config.MAX_QUEUED_DOCUMENTS,
+    max_queued_bytes=config.MAX_QUEUED_MB * 1024 * 1024,
+    lane_weights=parse_weights(config.SCHEDULER_LANE_WEIGHTS),
+    tenant_weights=parse_weights(config.SCHEDULER_TENANT_WEIGHTS)
+)
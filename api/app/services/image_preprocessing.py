@@ -0,0 +1,199 @@
+"""
+Page image preprocessing ahead of OCR.
+
+Every step is a whole-array NumPy operation over a page and can be
+switched on or off individually. Steps
+other than grayscale work on luminance, so enabling any of them implies
+grayscale output.
+"""
+
+from typing import Dict, Iterable, Tuple
+import time
+
+import numpy as np
+from PIL import Image
+
+# Execution order; the order in the configuration does not matter
+STEPS = ("grayscale", "downscale", "deskew", "crop", "binarize")
+
+
+def to_grayscale(page: np.ndarray) -> np.ndarray:
+    """ITU-R 601 luma from an RGB(A) or already-gray array"""
+    if page.ndim == 2:
+        return page
+    rgb = page[..., :3].astype(np.float32)
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return gray.astype(np.uint8)
+
+
+def downscale(page: np.ndarray, max_width: int) -> np.ndarray:
+    """Shrink by an integer factor using block means until width fits"""
+    height, width = page.shape
+    factor = -(-width // max_width)
+    if factor <= 1:
+        return page
+
+    height, width = height - height % factor, width - width % factor
+    blocks = page[:height, :width].reshape(height // factor, factor, width // factor, factor)
+    return blocks.mean(axis=(1, 3)).astype(np.uint8)
+
+
+def estimate_skew(page: np.ndarray, max_angle: float = 5.0, step: float = 0.25) -> float:
+    """
+    Projection-profile skew estimate: shear the dark pixel coordinates for
+    each candidate angle and keep the angle whose row histogram is sharpest.
+    """
+    ys, xs = np.nonzero(page < 128)
+    if len(ys) < 100:
+        return 0.0
+
+    # A sample of dark pixels is enough for a stable profile
+    if len(ys) > 200_000:
+        pick = np.random.default_rng(0).choice(len(ys), 200_000, replace=False)
+        ys, xs = ys[pick], xs[pick]
+
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    shifted = ys[None, :] - xs[None, :] * np.tan(np.radians(angles))[:, None]
+    shifted = np.round(shifted - shifted.min()).astype(np.int64)
+
+    length = int(shifted.max()) + 1
+    offsets = (np.arange(len(angles)) * length)[:, None]
+    profiles = np.bincount((shifted + offsets).ravel(), minlength=len(angles) * length)
+    profiles = profiles.reshape(len(angles), length).astype(np.float64)
+
+    scores = (np.diff(profiles, axis=1) ** 2).sum(axis=1)
+    return float(angles[int(np.argmax(scores))])
+
+
+def deskew(page: np.ndarray) -> np.ndarray:
+    angle = estimate_skew(page)
+    if abs(angle) < 0.1:
+        return page
+    rotated = Image.fromarray(page).rotate(angle, resample=Image.BILINEAR, expand=True, fillcolor=255)
+    return np.asarray(rotated)
+
+
+def crop_borders(page: np.ndarray, margin: int = 10) -> np.ndarray:
+    """
+    Crop to the content area, dropping blank margins and the solid dark bands
+    scanners leave along page edges.
+    """
+    dark = page < 128
+    row_ink = dark.mean(axis=1)
+    col_ink = dark.mean(axis=0)
+
+    rows = np.nonzero((row_ink > 0.002) & (row_ink < 0.8))[0]
+    cols = np.nonzero((col_ink > 0.002) & (col_ink < 0.8))[0]
+    if len(rows) == 0 or len(cols) == 0:
+        return page
+
+    top, bottom = max(rows[0] - margin, 0), min(rows[-1] + margin + 1, page.shape[0])
+    left, right = max(cols[0] - margin, 0), min(cols[-1] + margin + 1, page.shape[1])
+    return page[top:bottom, left:right]
+
+
+def binarize(page: np.ndarray, sensitivity: float = 0.15) -> np.ndarray:
+    """
+    Adaptive (Bradley) thresholding: a pixel is ink when it is darker than
+    the mean of its neighbourhood by `sensitivity`. Local means come from an
+    integral image, so the cost is independent of the window size.
+    """
+    height, width = page.shape
+    window = max(15, (min(height, width) // 40) | 1)
+    half = window // 2
+
+    # Integral image padded by half a window on every side (zeros before,
+    # the last row/column repeated after), so each window corner is a plain
+    # shifted slice and windows are clipped at the page edges
+    integral = np.zeros((height + 1, width + 1), dtype=np.int64)
+    np.cumsum(page, axis=0, dtype=np.int64, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+    integral = np.pad(integral, half, mode="edge")
+
+    sums = integral[window:, window:] - integral[:height, window:]
+    sums -= integral[window:, :width]
+    sums += integral[:height, :width]
+    del integral
+
+    rows = np.arange(height)
+    cols = np.arange(width)
+    row_areas = np.minimum(rows + half + 1, height) - np.maximum(rows - half, 0)
+    col_areas = np.minimum(cols + half + 1, width) - np.maximum(cols - half, 0)
+
+    # Compare in integers scaled by 1000: page * area < sums * (1 - sensitivity)
+    sums *= 1000 - round(1000 * sensitivity)
+    scaled = page.astype(np.int64)
+    scaled *= 1000 * row_areas[:, None]
+    scaled *= col_areas[None, :]
+
+    binary = np.full(page.shape, 255, dtype=np.uint8)
+    binary[scaled < sums] = 0
+    return binary
+
+
+class ImagePreprocessor:
+    def __init__(self, steps: Iterable[str], max_width: int = 2500):
+        unknown = set(steps) - set(STEPS)
+        if unknown:
+            raise ValueError(f"Unknown preprocessing steps: {', '.join(sorted(unknown))}")
+
+        self.steps = [step for step in STEPS if step in set(steps)]
+        self.max_width = max_width
+
+    def _apply(self, step: str, page: np.ndarray) -> np.ndarray:
+        if step == "grayscale":
+            return page
+        if step == "downscale":
+            return downscale(page, self.max_width)
+        if step == "deskew":
+            return deskew(page)
+        if step == "crop":
+            return crop_borders(page)
+        return binarize(page)
+
+    def process(self, image: Image.Image) -> Tuple[Image.Image, Dict[str, float]]:
+        """
+        Run the enabled steps over a page and return the processed page with
+        the seconds spent in each step.
+        """
+        if not self.steps:
+            return image, {}
+
+        timings: Dict[str, float] = {}
+
+        started = time.perf_counter()
+        page = to_grayscale(np.asarray(image if image.mode in ("L", "RGB", "RGBA") else image.convert("RGB")))
+        timings["grayscale"] = time.perf_counter() - started
+
+        for step in self.steps:
+            if step == "grayscale":
+                continue
+            started = time.perf_counter()
+            page = self._apply(step, page)
+            timings[step] = time.perf_counter() - started
+
+        return Image.fromarray(page), timings
+
+
+def ink_density(image: Image.Image, margin: float = 0.05) -> float:
+    """Fraction of dark pixels on a small grayscale copy, ignoring the page margins"""
+    thumbnail = image.convert("L")
+    thumbnail.thumbnail((500, 500))
+    page = np.asarray(thumbnail)
+
+    dy, dx = int(page.shape[0] * margin), int(page.shape[1] * margin)
+    inner = page[dy:page.shape[0] - dy, dx:page.shape[1] - dx]
+    if inner.size == 0:
+        return 0.0
+    return float((inner < 128).mean())
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 16) -> str:
+    """
+    Difference hash: compare neighbouring cells of a tiny grayscale copy.
+    Rescans and re-renders of the same page land within a few bits.
+    """
+    small = np.asarray(image.convert("L").resize((hash_size + 1, hash_size), Image.BOX), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    value = int("".join("1" if bit else "0" for bit in bits), 2)
+    return f"{value:0{hash_size * hash_size // 4}x}"
@@ -1,11 +1,8 @@
-from openai import OpenAI
+from app.services.openai_client import chat_completion
 
 class LLMService:
-  def __init__(self):
-    self.client = OpenAI()
-
-  def summarize(self, content: str) -> str:
-    response = self.client.chat.completions.create(
+  async def summarize(self, content: str) -> str:
+    return await chat_completion(
       model="gpt-4o-mini",
       messages=[
         {
@@ -18,6 +15,4 @@ class LLMService:
         }
       ],
       temperature=0.3
-    )
-
-    return response.choices[0].message.content.strip()
\ No newline at end of file
+    )
\ No newline at end of file
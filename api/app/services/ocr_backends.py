@@ -0,0 +1,115 @@
+"""
+OCR backends - engines that turn an in-memory page image into text.
+
+Backends are created once per worker process and reused for every page
+that worker handles.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+import pytesseract
+from PIL import Image
+
+
+def _mean(values) -> Optional[float]:
+    values = list(values)
+    return sum(values) / len(values) if values else None
+
+
+class OCRBackend(ABC):
+    """Base class for OCR engines"""
+
+    name = "base"
+
+    def __init__(self, lang: str):
+        self.lang = lang
+
+    @abstractmethod
+    def image_to_string(self, image: Image.Image) -> str:
+        ...
+
+    @abstractmethod
+    def image_to_text_and_confidence(self, image: Image.Image) -> Tuple[str, Optional[float]]:
+        """Return the page text and the mean word confidence (0-100)"""
+
+
+class PytesseractBackend(OCRBackend):
+    """Runs the tesseract CLI for every page (model reloaded each call)"""
+
+    name = "pytesseract"
+
+    def image_to_string(self, image: Image.Image) -> str:
+        return pytesseract.image_to_string(image, lang=self.lang)
+
+    def image_to_text_and_confidence(self, image: Image.Image) -> Tuple[str, Optional[float]]:
+        # One tesseract run; the text is rebuilt from the word boxes
+        data = pytesseract.image_to_data(image, lang=self.lang, output_type=pytesseract.Output.DICT)
+
+        lines: Dict[Tuple[int, int, int], list] = {}
+        confidences = []
+        for i, word in enumerate(data["text"]):
+            if not word.strip():
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+            confidence = float(data["conf"][i])
+            if confidence >= 0:
+                confidences.append(confidence)
+
+        text_lines = []
+        previous = None
+        for key, words in lines.items():
+            if previous is not None and key[:2] != previous[:2]:
+                text_lines.append("")
+            text_lines.append(" ".join(words))
+            previous = key
+
+        return "\n".join(text_lines), _mean(confidences)
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    Keeps a libtesseract engine resident in the worker via tesserocr, so the
+    traineddata is loaded once and images are passed in memory.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str):
+        super().__init__(lang)
+        try:
+            import tesserocr
+        except ImportError:
+            raise RuntimeError(
+                "OCR_BACKEND=tesserocr requires the 'tesserocr' package. "
+                "Install it with: pip install tesserocr"
+            )
+        self.api = tesserocr.PyTessBaseAPI(lang=lang)
+
+    def image_to_string(self, image: Image.Image) -> str:
+        self.api.SetImage(image)
+        return self.api.GetUTF8Text()
+
+    def image_to_text_and_confidence(self, image: Image.Image) -> Tuple[str, Optional[float]]:
+        self.api.SetImage(image)
+        text = self.api.GetUTF8Text()
+        return text, _mean(self.api.AllWordConfidences())
+
+
+BACKENDS = {
+    PytesseractBackend.name: PytesseractBackend,
+    TesserocrBackend.name: TesserocrBackend,
+}
+
+# Engines already loaded in this process, by (backend, lang)
+_loaded: Dict[Tuple[str, str], OCRBackend] = {}
+
+
+def get_backend(name: str, lang: str) -> OCRBackend:
+    """Return the process-local engine for a backend and language"""
+    key = (name, lang)
+    if key not in _loaded:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown OCR backend: {name}. Supported: {', '.join(BACKENDS)}")
+        _loaded[key] = BACKENDS[name](lang)
+    return _loaded[key]
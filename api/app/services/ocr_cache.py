@@ -0,0 +1,103 @@
+"""
+Content-addressed OCR result cache.
+
+Keys combine the SHA-256 of the file content with the page index, DPI,
+Tesseract language and extraction settings, so renamed or re-uploaded
+copies of the same scan hit the same entries. Lookups go to an in-memory
+LRU first, then MongoDB.
+"""
+
+from typing import Optional, Union
+import hashlib
+import logging
+import mmap
+import os
+
+from app.core.cache import LRUCache
+from app.core.config import config
+from app.repositories.cache_repo import OCRCacheRepository
+from app.services.ocr_worker import OCRPage
+
+logger = logging.getLogger(__name__)
+
+
+class OCRCache:
+    def __init__(self):
+        self.memory = LRUCache(
+            max_bytes=config.OCR_CACHE_MEMORY_MB * 1024 * 1024,
+            sizeof=lambda fields: len(fields["text"].encode("utf-8"))
+        )
+        self.persistent = config.OCR_CACHE_PERSISTENT
+
+    @staticmethod
+    def file_digest(file_path: str) -> str:
+        """Hash file content, memory-mapping large files instead of reading them"""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            if os.path.getsize(file_path) >= config.OCR_MMAP_THRESHOLD_MB * 1024 * 1024:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+            else:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def bytes_digest(data: Union[bytes, memoryview]) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def digest(self, source: Union[str, bytes, memoryview]) -> str:
+        """Hash a file given by path or by its content"""
+        if isinstance(source, str):
+            return self.file_digest(source)
+        return self.bytes_digest(source)
+
+    @staticmethod
+    def make_key(digest: str, page_num: int, dpi: int, lang: str, variant: str = "") -> str:
+        return f"{digest}:{page_num}:{dpi}:{lang}:{variant}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached OCRPage fields (without page_number) for a key"""
+        fields = self.memory.get(key)
+        if fields is not None:
+            return fields
+
+        if not self.persistent:
+            return None
+
+        try:
+            doc = OCRCacheRepository.get(key)
+        except Exception as e:
+            logger.warning(f"OCR cache lookup failed: {e}")
+            return None
+
+        if doc is None or "page" not in doc:
+            return None
+        if doc["page"].get("source") == "duplicate":
+            # Written by versions that marked repeated pages; holds no text
+            return None
+
+        # Entries of older versions may carry fields OCRPage no longer has
+        fields = {name: value for name, value in doc["page"].items() if name in OCRPage._fields}
+        self.memory.set(key, fields)
+        return fields
+
+    def set(self, key: str, page: OCRPage):
+        fields = page._asdict()
+        fields.pop("page_number")
+        # Timings and re-scans describe the run that produced the entry, not later hits
+        fields["timings"] = None
+        fields["rescanned"] = False
+        self.memory.set(key, fields)
+
+        if not self.persistent:
+            return
+
+        try:
+            OCRCacheRepository.set(key, fields)
+        except Exception as e:
+            logger.warning(f"OCR cache write failed: {e}")
+
+
+# Shared by every OCRService instance
+ocr_cache = OCRCache()
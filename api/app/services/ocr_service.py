@@ -1,48 +1,249 @@
-from typing import List, Tuple
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import concurrent.futures
+import asyncio
+import logging
+import threading
 import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
-import tempfile
 import os
 
+from app.core.config import config
+from app.core.scheduler import FairScheduler, parse_weights
+from app.services.ocr_cache import ocr_cache
+from app.services.ocr_worker import (
+    OCRPage, PDFSource, SharedPDF,
+    get_ocr_executor, get_pdf_page_count, ocr_image, ocr_pdf_page, share_pdf
+)
+
+logger = logging.getLogger(__name__)
+
+# Threads that drive OCR jobs, kept apart from the default executor
+_ocr_job_threads = ThreadPoolExecutor(
+    max_workers=config.MAX_CONCURRENT_OCR_JOBS,
+    thread_name_prefix="ocr-job"
+)
+# Bounds the number of documents being OCR'd at once, shared fairly
+# between tenants and lanes
+ocr_scheduler = FairScheduler(
+    "ocr",
+    config.MAX_CONCURRENT_OCR_JOBS,
+    parse_weights(config.SCHEDULER_LANE_WEIGHTS),
+    parse_weights(config.SCHEDULER_TENANT_WEIGHTS),
+    tenant_limit=config.TENANT_MAX_OCR_JOBS
+)
+
 class OCRService:
-    def __init__(self, lang: str = "tam"):
-        self.lang = lang
+    def __init__(self, lang: str = None):
+        # Same language the worker processes preload their engine for
+        self.lang = lang or config.TESSERACT_LANG
         if not os.getenv("TESSDATA_PREFIX"):
             print("⚠️ Warning: TESSDATA_PREFIX not set. Tamil OCR may fail.")
 
         if os.getenv("TESSERACT_PATH"):
             pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_PATH")
-    
-    def extract_text_from_pdf(self, pdf_path: str, dpi: int = 300) -> List[Tuple[int, str]]:
+
+    @staticmethod
+    def _preprocess_variant() -> str:
+        steps = "+".join(sorted(config.OCR_PREPROCESS_STEPS)) or "none"
+        return f"{steps}@{config.OCR_PREPROCESS_MAX_WIDTH}:blank-{config.OCR_BLANK_INK_THRESHOLD}"
+
+    def get_pdf_page_count(self, pdf: PDFSource) -> int:
+        """Read the page count without rendering any page (or writing a temp file)"""
+        return get_pdf_page_count(pdf)
+
+    def iter_text_from_pdf(
+        self,
+        pdf: PDFSource,
+        dpi: int = None,
+        batch_size: int = None,
+        done_pages: Optional[Dict[int, OCRPage]] = None
+    ) -> Iterator[OCRPage]:
+        """
+        OCR a PDF (path or in-memory bytes) on the shared worker pool,
+        yielding pages in order. At most `batch_size` pages of this
+        document are in flight at once, and each worker renders only the
+        page it is working on. Pages with a usable embedded text layer skip
+        rasterization entirely and blank pages skip OCR.
+        Pages in `done_pages` (by page number, e.g. from a checkpoint) are
+        yielded as given.
+        """
+        batch_size = max(1, batch_size or config.OCR_PAGE_BATCH_SIZE)
+        dpi = dpi or config.OCR_HIGH_DPI
+        total_pages = self.get_pdf_page_count(pdf)
+        done_pages = done_pages or {}
+        digest = None
+        executor = get_ocr_executor()
+
+        use_text_layer = config.OCR_USE_TEXT_LAYER
+        text_layer = f"text_layer-{config.OCR_TEXT_LAYER_MIN_COVERAGE}" if use_text_layer else "ocr"
+        variant = f"{config.OCR_BACKEND}:{text_layer}:{self._preprocess_variant()}"
+
+        # Adaptive mode: fast low-DPI pass, high-DPI re-scan of doubtful pages
+        fast_dpi = config.OCR_FAST_DPI if config.OCR_ADAPTIVE_DPI else None
+        if fast_dpi:
+            variant += f":adaptive-{fast_dpi}-{config.OCR_MIN_CONFIDENCE}"
+
+        # (page_num, cache_key, cached_entry, future) in page order
+        in_flight = deque()
+        next_page = 1
+
+        # Page jobs get in-memory PDFs through shared memory rather than
+        # each pickling a copy of the whole file
+        shared = None
+        job_pdf = pdf
+        if not isinstance(pdf, str):
+            shared = share_pdf(pdf)
+            job_pdf = SharedPDF(shared.name, len(pdf))
+
+        try:
+            while next_page <= total_pages or in_flight:
+                while next_page <= total_pages and len(in_flight) < batch_size:
+                    if next_page in done_pages:
+                        in_flight.append((next_page, None, None, None))
+                        next_page += 1
+                        continue
+
+                    digest = digest or ocr_cache.digest(pdf)
+                    key = ocr_cache.make_key(digest, next_page, dpi, self.lang, variant)
+                    cached = ocr_cache.get(key)
+                    future = None
+                    if cached is None:
+                        future = executor.submit(
+                            ocr_pdf_page,
+                            job_pdf,
+                            next_page,
+                            dpi,
+                            self.lang,
+                            use_text_layer,
+                            config.OCR_TEXT_LAYER_MIN_CHARS,
+                            config.OCR_TEXT_LAYER_MIN_COVERAGE,
+                            fast_dpi,
+                            config.OCR_MIN_CONFIDENCE
+                        )
+                    in_flight.append((next_page, key, cached, future))
+                    next_page += 1
+
+                page_num, key, cached, future = in_flight.popleft()
+                if key is None:
+                    page = done_pages[page_num]
+                else:
+                    if future is not None:
+                        page = future.result()
+                        ocr_cache.set(key, page)
+                    else:
+                        page = OCRPage(page_num, **cached)
+                yield page
+        finally:
+            for _, _, _, future in in_flight:
+                if future is not None:
+                    future.cancel()
+            if shared is not None:
+                shared.close()
+                shared.unlink()
+
+    def extract_text_from_pdf(self, pdf: PDFSource, dpi: int = None) -> List[OCRPage]:
         """Extract text from PDF page by page"""
-        pages = convert_from_path(pdf_path, dpi=dpi)
-        results = []
-        
-        for i, page in enumerate(pages, start=1):
-            text = pytesseract.image_to_string(page, lang=self.lang)
-            results.append((i, text.strip()))
-        
-        return results
-    
-    def extract_text_from_image(self, image_path: str) -> List[Tuple[int, str]]:
-        """Extract text from image"""
-        image = Image.open(image_path)
-        text = pytesseract.image_to_string(image, lang=self.lang)
-        return [(1, text.strip())]
-    
-    def extract_from_bytes(self, file_bytes: bytes, file_type: str) -> List[Tuple[int, str]]:
-        """Extract text from bytes (PDF or image)"""
-        with tempfile.NamedTemporaryFile(suffix=f".{file_type}", delete=False) as tmp:
-            tmp.write(file_bytes)
-            tmp_path = tmp.name
-        
+        return list(self.iter_text_from_pdf(pdf, dpi=dpi))
+
+    def extract_text_from_image(self, image: Union[str, bytes]) -> List[OCRPage]:
+        """Extract text from an image file path or encoded image bytes"""
+        key = ocr_cache.make_key(
+            ocr_cache.digest(image), 1, 0, self.lang, f"{config.OCR_BACKEND}:{self._preprocess_variant()}"
+        )
+        cached = ocr_cache.get(key)
+        if cached is not None:
+            return [OCRPage(1, **cached)]
+
+        page = get_ocr_executor().submit(ocr_image, image, self.lang).result()
+        ocr_cache.set(key, page)
+        return [page]
+
+    def extract_from_bytes(self, file_bytes: Union[bytes, memoryview], file_type: str) -> List[OCRPage]:
+        """Extract text from bytes (PDF or image) without writing them to disk"""
+        if isinstance(file_bytes, memoryview):
+            # Workers receive jobs by pickling, which needs real bytes
+            file_bytes = file_bytes.tobytes()
+
+        if file_type == "pdf":
+            return self.extract_text_from_pdf(file_bytes)
+        return self.extract_text_from_image(file_bytes)
+
+    async def stream_pages(
+        self,
+        source: Union[str, bytes],
+        file_type: str,
+        done_pages: Optional[Dict[int, OCRPage]] = None
+    ) -> AsyncIterator[OCRPage]:
+        """
+        Async OCR stage: run the blocking extractor off the event loop and
+        hand each page over as soon as it is ready, so early pages can be
+        translated while later ones still render. `source` is a file path
+        or the file's bytes when they are already in memory; `done_pages`
+        are pages (by number) that need no extraction at all.
+        """
+        # The OCR slot covers extraction only: it is given back as soon as
+        # the producer is done, not when the caller has used every page
+        tenant_key = await ocr_scheduler.acquire()
+        released = False
+
+        def release_slot(*_):
+            nonlocal released
+            if not released:
+                released = True
+                ocr_scheduler.release(tenant_key)
+
         try:
-            if file_type == "pdf":
-                results = self.extract_text_from_pdf(tmp_path)
-            else:
-                results = self.extract_text_from_image(tmp_path)
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue(maxsize=config.OCR_PAGE_BATCH_SIZE)
+            stop = threading.Event()
+            done = object()
+
+            def put(item) -> bool:
+                # Block the OCR thread while the consumer is behind
+                while not stop.is_set():
+                    future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+                    try:
+                        future.result(timeout=1.0)
+                        return True
+                    except concurrent.futures.TimeoutError:
+                        # A put that completed as the wait timed out cannot be
+                        # cancelled; it must not be retried
+                        if not future.cancel():
+                            future.result()
+                            return True
+                return False
+
+            def produce():
+                try:
+                    if file_type == "pdf":
+                        pages = self.iter_text_from_pdf(source, done_pages=done_pages)
+                    elif done_pages and 1 in done_pages:
+                        pages = [done_pages[1]]
+                    else:
+                        pages = self.extract_text_from_image(source)
+
+                    for page in pages:
+                        if not put(page):
+                            return
+                    put(done)
+                except Exception as e:
+                    put(e)
+
+            producer = loop.run_in_executor(_ocr_job_threads, produce)
+            producer.add_done_callback(release_slot)
+
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is done:
+                        break
+                    if isinstance(item, Exception):
+                        logger.error(f"OCR extraction failed: {str(item)}")
+                        raise Exception(f"OCR extraction failed: {str(item)}")
+                    yield item
+            finally:
+                stop.set()
+                await producer
         finally:
-            os.unlink(tmp_path)
-        
-        return results
+            release_slot()
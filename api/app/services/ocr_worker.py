@@ -0,0 +1,370 @@
+"""
+OCR worker pool - page-level OCR jobs executed in separate processes.
+
+Kept free of database and web imports so spawned workers start quickly.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, NamedTuple, Optional, Union
+import logging
+import multiprocessing
+import subprocess
+import threading
+import time
+import mmap
+import io
+import re
+import os
+
+import pytesseract
+from pdf2image import convert_from_path
+from PIL import Image
+
+from app.core.config import config
+from app.services.ocr_backends import get_backend
+from app.services.image_preprocessing import ImagePreprocessor, ink_density, perceptual_hash
+
+logger = logging.getLogger(__name__)
+
+class SharedPDF(NamedTuple):
+    """An in-memory PDF placed in shared memory for the worker processes"""
+    name: str
+    size: int
+
+
+# A PDF is passed as a path on disk, as its raw bytes, or (to workers) in
+# shared memory
+PDFSource = Union[str, bytes, SharedPDF]
+
+_executor: Optional[ProcessPoolExecutor] = None
+_preprocessor: Optional[ImagePreprocessor] = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker(tesseract_cmd: Optional[str], backend: str, lang: str):
+    """Per-process setup for OCR workers"""
+    # Parallelism comes from the pool; keep each tesseract single-threaded
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    # Load the engine up front; a failure here resurfaces on the first page
+    try:
+        get_backend(backend, lang)
+    except Exception as e:
+        logger.warning(f"OCR worker {os.getpid()} could not load {backend} ({lang}): {e}")
+
+
+# Page sources reported alongside the text
+SOURCE_TEXT_LAYER = "text_layer"
+SOURCE_OCR = "ocr"
+# No ink: skipped before OCR
+SOURCE_BLANK = "blank"
+
+# Tamil dependent vowel signs and virama can never start a word
+_ORPHAN_TAMIL_SIGN = re.compile(r"(?:^|\s)[\u0BBE-\u0BCD\u0BD7]")
+# Latin-1 supplement, private-use glyphs and replacement characters are what
+# legacy (non-Unicode) Tamil fonts extract as
+_LEGACY_GLYPH = re.compile(r"[\u0080-\u00FF\uE000-\uF8FF\uFFFD]")
+# ASCII-mapped Tamil fonts (Bamini and friends) put ; [ ] ` inside words
+_ASCII_MAPPED_WORD = re.compile(r"[A-Za-z][;\[\]`\\][A-Za-z]")
+
+
+class OCRPage(NamedTuple):
+    page_number: int
+    text: str
+    source: str = SOURCE_OCR
+    # Render resolution of the OCR pass that produced the text (0 if none)
+    dpi: int = 0
+    # Mean Tesseract word confidence, when measured
+    confidence: Optional[float] = None
+    # Seconds spent per preprocessing step and in the OCR engine ("ocr")
+    timings: Optional[Dict[str, float]] = None
+    # Perceptual hash of the rendered page
+    image_hash: Optional[str] = None
+    # Whether a low-confidence fast pass was re-scanned at high DPI (whichever
+    # pass was kept)
+    rescanned: bool = False
+
+
+# Placeholder for the PDF argument in poppler command lines
+PDF_ARG = object()
+
+
+def _run_poppler(command: list, pdf: PDFSource, timeout: int = 120) -> Optional[bytes]:
+    """
+    Run a poppler tool with its PDF argument taken from a path, or from
+    bytes piped through stdin ("-") so nothing is written to disk.
+    """
+    stdin = None
+    if not isinstance(pdf, str):
+        stdin = pdf
+        pdf = "-"
+    command = [pdf if arg is PDF_ARG else arg for arg in command]
+
+    try:
+        result = subprocess.run(command, input=stdin, capture_output=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def get_pdf_page_count(pdf: PDFSource) -> int:
+    """Read the page count with pdfinfo, piping in-memory PDFs through stdin"""
+    output = _run_poppler(["pdfinfo", PDF_ARG], load_pdf(pdf), timeout=60)
+    match = re.search(rb"^Pages:\s+(\d+)", output or b"", re.MULTILINE)
+    if not match:
+        raise Exception("Failed to read the PDF page count")
+    return int(match.group(1))
+
+
+def share_pdf(pdf: bytes) -> shared_memory.SharedMemory:
+    """Copy an in-memory PDF into shared memory once, for every page job to read"""
+    shared = shared_memory.SharedMemory(create=True, size=max(1, len(pdf)))
+    shared.buf[:len(pdf)] = pdf
+    return shared
+
+
+def load_pdf(pdf: PDFSource) -> Union[str, bytes]:
+    """Resolve a SharedPDF to its bytes; paths and bytes are returned as they are"""
+    if not isinstance(pdf, SharedPDF):
+        return pdf
+    shared = shared_memory.SharedMemory(name=pdf.name)
+    try:
+        return bytes(shared.buf[:pdf.size])
+    finally:
+        shared.close()
+
+
+def extract_pdf_text_layer(pdf: PDFSource, page_num: int) -> str:
+    """Read the embedded text of a single PDF page with poppler's pdftotext"""
+    output = _run_poppler(
+        ["pdftotext", "-f", str(page_num), "-l", str(page_num), "-enc", "UTF-8", PDF_ARG, "-"],
+        pdf,
+        timeout=60
+    )
+    if output is None:
+        return ""
+    return output.decode("utf-8", errors="replace").strip()
+
+
+_BBOX_PAGE = re.compile(r'<page width="([\d.]+)" height="([\d.]+)"')
+_BBOX_WORD = re.compile(r'<word xMin="([\d.]+)" yMin="([\d.]+)" xMax="([\d.]+)" yMax="([\d.]+)"')
+
+
+def text_layer_coverage(pdf: PDFSource, page_num: int) -> float:
+    """Fraction of a PDF page's area covered by the boxes of its text-layer words"""
+    output = _run_poppler(
+        ["pdftotext", "-bbox", "-f", str(page_num), "-l", str(page_num), PDF_ARG, "-"],
+        pdf,
+        timeout=60
+    )
+    if output is None:
+        return 0.0
+
+    html = output.decode("utf-8", errors="replace")
+    page = _BBOX_PAGE.search(html)
+    if not page:
+        return 0.0
+    page_area = float(page.group(1)) * float(page.group(2))
+    if page_area <= 0:
+        return 0.0
+
+    words_area = sum(
+        (float(x_max) - float(x_min)) * (float(y_max) - float(y_min))
+        for x_min, y_min, x_max, y_max in _BBOX_WORD.findall(html)
+    )
+    return min(1.0, words_area / page_area)
+
+
+def render_pdf_page(pdf: PDFSource, page_num: int, dpi: int) -> Image.Image:
+    """Render a single PDF page; in-memory PDFs are rendered through stdin/stdout"""
+    if isinstance(pdf, str):
+        return convert_from_path(pdf, dpi=dpi, first_page=page_num, last_page=page_num)[0]
+
+    # pdftoppm writes a single-page PPM to stdout when no output root is given
+    output = _run_poppler(
+        ["pdftoppm", "-f", str(page_num), "-l", str(page_num), "-r", str(dpi), PDF_ARG],
+        pdf
+    )
+    if not output:
+        raise Exception(f"Failed to render page {page_num}")
+    return Image.open(io.BytesIO(output))
+
+
+def open_image_file(image_path: str) -> Image.Image:
+    """Open and decode an image file, memory-mapping large ones"""
+    if os.path.getsize(image_path) < config.OCR_MMAP_THRESHOLD_MB * 1024 * 1024:
+        image = Image.open(image_path)
+        image.load()
+        return image
+
+    with open(image_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        image = Image.open(mapped)
+        image.load()
+        return image
+
+
+def is_usable_text_layer(text: str, min_chars: int) -> bool:
+    """
+    Decide whether an embedded text layer can replace OCR.
+    Rejects near-empty layers, the garbage that legacy (non-Unicode) Tamil
+    fonts extract as, and Tamil text whose vowel signs come out detached
+    from their consonants.
+    """
+    chars = "".join(text.split())
+    if len(chars) < min_chars:
+        return False
+
+    if len(_LEGACY_GLYPH.findall(chars)) / len(chars) > 0.02:
+        return False
+
+    words = text.split()
+    if sum(1 for w in words if _ASCII_MAPPED_WORD.search(w)) / len(words) > 0.05:
+        return False
+
+    if re.search(r"[\u0B80-\u0BFF]", text):
+        if len(_ORPHAN_TAMIL_SIGN.findall(text)) / len(words) > 0.05:
+            return False
+
+    return True
+
+
+def get_preprocessor() -> ImagePreprocessor:
+    """Process-local preprocessor built from OCR_PREPROCESS_STEPS"""
+    global _preprocessor
+    if _preprocessor is None:
+        _preprocessor = ImagePreprocessor(
+            config.OCR_PREPROCESS_STEPS,
+            max_width=config.OCR_PREPROCESS_MAX_WIDTH
+        )
+    return _preprocessor
+
+
+def _ocr_image(image: Image.Image, lang: str, with_confidence: bool):
+    """Preprocess and OCR one page image; returns (text, confidence, timings)"""
+    image, timings = get_preprocessor().process(image)
+
+    started = time.perf_counter()
+    backend = get_backend(config.OCR_BACKEND, lang)
+    if with_confidence:
+        text, confidence = backend.image_to_text_and_confidence(image)
+    else:
+        text, confidence = backend.image_to_string(image), None
+    timings["ocr"] = time.perf_counter() - started
+
+    return text.strip(), confidence, timings
+
+
+def _screen_and_ocr(
+    image: Image.Image,
+    page_num: int,
+    dpi: int,
+    lang: str,
+    with_confidence: bool
+) -> OCRPage:
+    """Skip blank pages; OCR the rest"""
+    image_hash = perceptual_hash(image)
+
+    if ink_density(image) < config.OCR_BLANK_INK_THRESHOLD:
+        return OCRPage(page_num, "", SOURCE_BLANK, dpi, image_hash=image_hash)
+
+    text, confidence, timings = _ocr_image(image, lang, with_confidence)
+    return OCRPage(page_num, text, SOURCE_OCR, dpi, confidence, timings, image_hash)
+
+
+def _ocr_rendered_page(
+    pdf: PDFSource,
+    page_num: int,
+    dpi: int,
+    lang: str,
+    with_confidence: bool
+) -> OCRPage:
+    image = render_pdf_page(pdf, page_num, dpi)
+    try:
+        return _screen_and_ocr(image, page_num, dpi, lang, with_confidence)
+    finally:
+        image.close()
+
+
+def ocr_pdf_page(
+    pdf: PDFSource,
+    page_num: int,
+    dpi: int,
+    lang: str,
+    use_text_layer: bool = False,
+    text_layer_min_chars: int = 0,
+    text_layer_min_coverage: float = 0.0,
+    fast_dpi: Optional[int] = None,
+    min_confidence: float = 0
+) -> OCRPage:
+    """
+    Return a page's embedded text when usable and covering enough of the
+    page (at least `text_layer_min_coverage` of its area), otherwise
+    render and OCR it.
+    With `fast_dpi` set, the page is first OCR'd at that resolution and only
+    re-rendered at `dpi` when the mean word confidence is below
+    `min_confidence`. Blank pages are returned without OCR.
+    """
+    pdf = load_pdf(pdf)
+    if use_text_layer:
+        text = extract_pdf_text_layer(pdf, page_num)
+        if (
+            is_usable_text_layer(text, text_layer_min_chars)
+            and text_layer_coverage(pdf, page_num) >= text_layer_min_coverage
+        ):
+            return OCRPage(page_num, text, SOURCE_TEXT_LAYER)
+
+    if fast_dpi and fast_dpi < dpi:
+        page = _ocr_rendered_page(pdf, page_num, fast_dpi, lang, True)
+        if page.source != SOURCE_OCR:
+            return page
+        if page.confidence is not None and page.confidence >= min_confidence:
+            return page
+        rescan = _ocr_rendered_page(pdf, page_num, dpi, lang, with_confidence=True)
+        # Keep whichever pass Tesseract trusted more
+        if (rescan.confidence or 0) >= (page.confidence or 0):
+            return rescan._replace(image_hash=page.image_hash, rescanned=True)
+        return page._replace(rescanned=True)
+
+    return _ocr_rendered_page(pdf, page_num, dpi, lang, False)
+
+
+def ocr_image(image: Union[str, bytes], lang: str) -> OCRPage:
+    """OCR a single image given as a file path or as encoded bytes"""
+    if isinstance(image, str):
+        image = open_image_file(image)
+    else:
+        image = Image.open(io.BytesIO(image))
+
+    try:
+        return _screen_and_ocr(image, 1, 0, lang, False)
+    finally:
+        image.close()
+
+
+def get_ocr_executor() -> ProcessPoolExecutor:
+    """Process pool shared by every OCRService instance in this process"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=config.OCR_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(config.TESSERACT_PATH, config.OCR_BACKEND, config.TESSERACT_LANG)
+            )
+        return _executor
+
+
+def shutdown_ocr_executor():
+    """Stop the OCR workers (called on application shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
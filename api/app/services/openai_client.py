@@ -0,0 +1,249 @@
+"""
+Shared OpenAI access - one async client and HTTP connection pool per process.
+
+Every service talks to the API through chat_completion() so connection
+limits, keep-alive, timeouts, rate limits and retries are handled in one
+place. Identical requests in flight at the same time are sent once.
+"""
+
+from contextlib import nullcontext
+from typing import AsyncIterator, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from app.core.config import config
+from app.core.scheduler import FairScheduler, parse_weights
+from app.core.singleflight import SingleFlight
+from app.services.rate_limiter import backoff_delay, rate_limiter
+from app.services.tokenizer import count_message_tokens
+
+logger = logging.getLogger(__name__)
+
+# Failures worth retrying: rate limits, server errors, timeouts and dropped connections
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+
+_clients: Dict[str, AsyncOpenAI] = {}
+
+# Coalesces concurrent identical chat completions
+llm_singleflight = SingleFlight()
+# Requests waiting for the rate limiter, ordered fairly between tenants and lanes
+llm_scheduler = FairScheduler(
+    "llm",
+    config.LLM_MAX_CONCURRENT_REQUESTS,
+    parse_weights(config.SCHEDULER_LANE_WEIGHTS),
+    parse_weights(config.SCHEDULER_TENANT_WEIGHTS),
+    tenant_limit=config.TENANT_MAX_LLM_REQUESTS
+)
+
+
+def get_openai_client(api_key: Optional[str] = None) -> AsyncOpenAI:
+    """Process-wide async client (one per API key) sharing a pooled HTTP client"""
+    api_key = api_key or config.OPENAI_API_KEY
+    if api_key not in _clients:
+        _clients[api_key] = AsyncOpenAI(
+            api_key=api_key,
+            timeout=config.OPENAI_TIMEOUT_SECONDS,
+            # Retries go through create_with_retries so they respect the shared limits
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=config.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=config.OPENAI_KEEPALIVE_SECONDS
+                ),
+                timeout=httpx.Timeout(
+                    config.OPENAI_TIMEOUT_SECONDS,
+                    connect=config.OPENAI_CONNECT_TIMEOUT_SECONDS
+                )
+            )
+        )
+    return _clients[api_key]
+
+
+async def close_openai_clients():
+    """Close pooled connections (called on application shutdown)"""
+    for client in _clients.values():
+        await client.close()
+    _clients.clear()
+
+
+def _is_quota_exhausted(error: Exception) -> bool:
+    """429 for an exhausted plan or billing quota: waiting will not help"""
+    return isinstance(error, openai.RateLimitError) and getattr(error, "code", None) == "insufficient_quota"
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Server-requested delay in seconds, if the error response carries one"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        if "retry-after-ms" in response.headers:
+            return float(response.headers["retry-after-ms"]) / 1000
+        if "retry-after" in response.headers:
+            return float(response.headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+async def create_with_retries(api_key: Optional[str], estimated_tokens: int, slot_held: bool = False, **params):
+    """
+    Create a chat completion once the shared rate limiter has room for it,
+    queueing instead of failing. Retryable errors back off (honoring
+    retry-after) up to OPENAI_MAX_RETRIES times; a 429 also pauses every
+    other caller sharing the limiter. A 429 for insufficient quota is
+    raised at once, without pausing anyone. With `slot_held` the caller
+    already holds an llm_scheduler slot (e.g. for as long as a stream is
+    read), and none is taken per attempt.
+    """
+    client = get_openai_client(api_key)
+    for attempt in range(config.OPENAI_MAX_RETRIES + 1):
+        # Tenants take turns (weighted by tokens) at the rate limiter
+        slot = nullcontext() if slot_held else llm_scheduler.slot(cost=estimated_tokens / 1000)
+        async with slot:
+            await rate_limiter.acquire(estimated_tokens)
+            try:
+                return await client.chat.completions.create(**params)
+            except RETRYABLE_ERRORS as e:
+                if attempt == config.OPENAI_MAX_RETRIES or _is_quota_exhausted(e):
+                    raise
+                retry_after = _retry_after(e)
+                delay = backoff_delay(attempt, retry_after)
+                if isinstance(e, openai.RateLimitError):
+                    await asyncio.to_thread(rate_limiter.pause, retry_after or delay)
+                logger.warning(
+                    f"OpenAI call failed ({type(e).__name__}), retry {attempt + 1}/{config.OPENAI_MAX_RETRIES} "
+                    f"in {delay:.1f}s"
+                )
+        # Back off without holding a scheduler slot
+        await asyncio.sleep(delay)
+
+
+def _estimate_tokens(messages: List[dict], model: str) -> int:
+    return count_message_tokens(messages, model) + config.OPENAI_EXPECTED_OUTPUT_TOKENS
+
+
+def _request_key(
+    messages: List[dict],
+    model: str,
+    temperature: float,
+    api_key: Optional[str],
+    response_format: Optional[dict] = None
+) -> str:
+    """Identity of a request: model, prompt hash and sampling parameters"""
+    payload = json.dumps(
+        {
+            "messages": messages,
+            "temperature": temperature,
+            "response_format": response_format,
+            "api_key": hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+        },
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return f"{model}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+async def chat_completion(
+    messages: List[dict],
+    model: str,
+    temperature: float,
+    api_key: Optional[str] = None,
+    timeout: Optional[float] = None,
+    response_format: Optional[dict] = None
+) -> str:
+    """
+    Run a chat completion and return the stripped message text. Callers
+    making the same request while it is in flight share its result.
+    """
+    return await llm_singleflight.do(
+        _request_key(messages, model, temperature, api_key, response_format),
+        lambda: _chat_completion(messages, model, temperature, api_key, timeout, response_format)
+    )
+
+
+async def _chat_completion(
+    messages: List[dict],
+    model: str,
+    temperature: float,
+    api_key: Optional[str],
+    timeout: Optional[float],
+    response_format: Optional[dict]
+) -> str:
+    extra = {"response_format": response_format} if response_format else {}
+    estimated = _estimate_tokens(messages, model)
+    response = await create_with_retries(
+        api_key,
+        estimated,
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        timeout=timeout or config.OPENAI_TIMEOUT_SECONDS,
+        **extra
+    )
+    if response.usage is not None:
+        # Settle the estimate against what the call really used
+        await asyncio.to_thread(rate_limiter.adjust, response.usage.total_tokens - estimated)
+    return response.choices[0].message.content.strip()
+
+
+async def stream_chat_completion(
+    messages: List[dict],
+    model: str,
+    temperature: float,
+    api_key: Optional[str] = None,
+    timeout: Optional[float] = None,
+    response_format: Optional[dict] = None
+) -> AsyncIterator[str]:
+    """
+    Run a chat completion as a stream, yielding text deltas as they arrive.
+    Only opening the stream is retried; a failure mid-stream is raised.
+    The scheduler slot is held until the stream is read to the end or
+    closed, since the request occupies the API until then. If the same
+    request is already in flight, its full text is yielded once it is
+    ready instead.
+    """
+    key = _request_key(messages, model, temperature, api_key, response_format)
+    if llm_singleflight.in_flight(key):
+        yield await chat_completion(messages, model, temperature, api_key, timeout, response_format)
+        return
+
+    extra = {"response_format": response_format} if response_format else {}
+
+    llm_singleflight.lead(key)
+    estimated = _estimate_tokens(messages, model)
+    parts = []
+    try:
+        tenant_key = await llm_scheduler.acquire(cost=estimated / 1000)
+        try:
+            stream = await create_with_retries(
+                api_key,
+                estimated,
+                slot_held=True,
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                timeout=timeout or config.OPENAI_TIMEOUT_SECONDS,
+                stream=True,
+                **extra
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Stopped early: drop the connection instead of reading the rest
+                await stream.close()
+        finally:
+            llm_scheduler.release(tenant_key)
+    except BaseException as e:
+        llm_singleflight.reject(key, e)
+        raise
+    llm_singleflight.resolve(key, "".join(parts).strip())
@@ -0,0 +1,142 @@
+"""
+OpenAI rate limiting shared by every process on the host.
+
+Requests-per-minute and tokens-per-minute budgets are token buckets kept
+in a small SQLite file, so all uvicorn workers (and worker processes)
+draw from the same budget. Callers wait for capacity instead of failing,
+and a 429 pauses everyone until the server's retry-after has passed.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import asyncio
+import logging
+import random
+import sqlite3
+import time
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+# Longest single sleep while waiting, so pauses set by other workers are noticed
+_MAX_WAIT_SLICE = 5.0
+
+
+class RateLimiter:
+    def __init__(self, path: str, requests_per_minute: int, tokens_per_minute: int):
+        self.path = path
+        self.limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self._initialized = False
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Exclusive read-modify-write of the shared buckets"""
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS buckets ("
+                    "name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+                )
+                self._initialized = True
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    def _levels(self, conn: sqlite3.Connection, now: float) -> dict:
+        """Current bucket levels after refilling for the time elapsed"""
+        levels = {}
+        for name, limit in self.limits.items():
+            row = conn.execute("SELECT level, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+            level = limit if row is None else min(limit, row[0] + (now - row[1]) * limit / 60)
+            levels[name] = level
+        return levels
+
+    def _save(self, conn: sqlite3.Connection, name: str, level: float, now: float):
+        conn.execute(
+            "INSERT INTO buckets (name, level, updated) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET level = excluded.level, updated = excluded.updated",
+            (name, level, now)
+        )
+
+    def try_acquire(self, tokens: int) -> float:
+        """
+        Take one request and `tokens` tokens if available. Returns 0 when
+        granted, otherwise the seconds to wait before trying again.
+        """
+        now = time.time()
+        wanted = {"requests": 1, "tokens": tokens}
+        with self._transaction() as conn:
+            row = conn.execute("SELECT level FROM buckets WHERE name = 'paused_until'").fetchone()
+            if row is not None and row[0] > now:
+                return row[0] - now
+
+            levels = self._levels(conn, now)
+            waits = [
+                (min(wanted[name], limit) - levels[name]) * 60 / limit
+                for name, limit in self.limits.items()
+                if limit > 0 and levels[name] < min(wanted[name], limit)
+            ]
+            if waits:
+                return max(waits)
+
+            for name, limit in self.limits.items():
+                if limit > 0:
+                    self._save(conn, name, levels[name] - min(wanted[name], limit), now)
+            return 0.0
+
+    def adjust(self, tokens: int):
+        """Correct the token bucket once a call's real usage is known (negative refunds)"""
+        if not tokens or self.limits["tokens"] <= 0:
+            return
+        now = time.time()
+        with self._transaction() as conn:
+            level = self._levels(conn, now)["tokens"]
+            self._save(conn, "tokens", level - tokens, now)
+
+    def pause(self, seconds: float):
+        """Hold every caller back for `seconds` (after a 429)"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT level FROM buckets WHERE name = 'paused_until'").fetchone()
+            if row is None or row[0] < now + seconds:
+                self._save(conn, "paused_until", now + seconds, now)
+
+    async def acquire(self, tokens: int):
+        """Wait until a request costing `tokens` fits the budget"""
+        if self.limits["requests"] <= 0 and self.limits["tokens"] <= 0:
+            return
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire, tokens)
+            if wait <= 0:
+                return
+            # Jitter keeps waiting callers from retrying in lockstep
+            await asyncio.sleep(min(wait, _MAX_WAIT_SLICE) + random.uniform(0, 0.1))
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based): the server's
+    retry-after plus a little jitter when given, otherwise full-jitter
+    exponential backoff.
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, min(1.0, retry_after * 0.25))
+    cap = min(config.OPENAI_BACKOFF_MAX_SECONDS, config.OPENAI_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+# Shared by every OpenAI caller in this process
+rate_limiter = RateLimiter(
+    config.OPENAI_RATE_LIMIT_DB,
+    requests_per_minute=config.OPENAI_RPM_LIMIT,
+    tokens_per_minute=config.OPENAI_TPM_LIMIT
+)
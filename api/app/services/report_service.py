@@ -1,14 +1,19 @@
 import os
-from typing import Dict
+from collections import deque
+from typing import Dict, List, Optional, Tuple
 import asyncio
 import logging
 from app.models.report import DocumentRequest, DocumentResponse, PageData, ProcessingStatus
 from app.services.ocr_service import OCRService
-from app.services.translation_service import TranslationService
+from app.services.ocr_worker import OCRPage, SOURCE_BLANK, SOURCE_OCR
+from app.services.translation_service import PageBatcher, TranslationService
 from app.streaming.sse_manager import SSEManager
-from app.repositories.report_repo import OriginalFileRepository
+from app.repositories.report_repo import DocumentPageRepository, OriginalFileRepository
+from app.repositories.job_repo import JobRepository
+from app.services.admission import QueueFullError, Ticket, admission_controller
 from app.core.config import config
-from datetime import datetime
+from app.core.scheduler import LANE_BULK, current_lane, current_tenant, scheduling_context
+from datetime import datetime, timedelta
 from app.db.session import original_files
 import re
 
@@ -17,6 +22,9 @@ from bson import ObjectId
 
 logger = logging.getLogger(__name__)
 
+# Documents whose stored pages cover the whole file, so import can reuse them
+PAGES_STORED_STATUSES = ("completed", "imported")
+
 def contains_tamil(text: str) -> bool:
     return bool(re.search(r"[\u0B80-\u0BFF]", text))
 
@@ -26,47 +34,94 @@ class DocumentProcessingService:
         self.translation_service = TranslationService(
             api_key=os.getenv("OPENAI_API_KEY")
         )
-        self.sse_manager = SSEManager()
+        self.sse_manager = SSEManager(shared=config.JOB_QUEUE_ENABLED)
         self.active_processes: Dict[str, asyncio.Task] = {}    
     
-    async def import_document(self, file_path: str) -> str:
+    async def import_document(self, file_path: str, document_id: Optional[str] = None) -> str:
         """
-        OCR + translate a document and return final legal English text
+        OCR + translate a document and return final legal English text.
+        A document whose pages are already stored is built from them; a
+        freshly OCR'd one has its pages stored for the next import.
         """
+        file_doc = None
+        if document_id:
+            file_doc = await asyncio.to_thread(OriginalFileRepository.get_by_id, document_id)
+            if file_doc and file_doc.get("processing_status") in PAGES_STORED_STATUSES:
+                pages = await asyncio.to_thread(DocumentPageRepository.get_by_document, document_id)
+                # A page missing from the store would silently drop out of the import
+                if len(pages) >= (file_doc.get("page_count") or 0):
+                    return self._import_text(pages)
+                logger.warning(
+                    f"Only {len(pages)} of {file_doc['page_count']} pages of {document_id} are stored, "
+                    f"extracting it again"
+                )
 
-        # OCR page-by-page
-        pages = self.ocr_service.extract_text_from_pdf(file_path)
-
-        final_pages = []
+        pages = []
 
-        for page_num, text in pages:
-            if not text.strip():
-                continue
+        # OCR page-by-page
+        async for page in self.ocr_service.stream_pages(file_path, "pdf"):
+            page_num, text = page.page_number, page.text
 
-            # Tamil or mixed → translate
-            if contains_tamil(text):
+            # Tamil or mixed → translate; English is kept as is
+            translated = None
+            if text.strip() and contains_tamil(text):
                 translated = await self.translation_service.translate_to_legal_english(
                     tamil_text=text,
                     page_num=page_num
                 )
-                final_pages.append(
-                    f"Page {page_num}\n{translated}"
-                )
-            else:
-                # Already English
-                final_pages.append(
-                    f"Page {page_num}\n{text.strip()}"
-                )
 
+            pages.append(PageData(
+                page_number=page_num,
+                original_text=text,
+                legal_english=translated,
+                extraction_method=page.source,
+                image_hash=page.image_hash,
+                status=ProcessingStatus.COMPLETED
+            ))
+
+        if file_doc:
+            await asyncio.to_thread(
+                DocumentPageRepository.bulk_upsert, document_id, file_doc["report_id"], pages
+            )
+            await asyncio.to_thread(
+                OriginalFileRepository.update_processing, document_id, "imported", len(pages), failed_pages=[]
+            )
+
+        return self._import_text(pages)
+
+    @staticmethod
+    def _import_text(pages: List[PageData]) -> str:
+        """Import text: legal English for Tamil pages, the original text for English ones"""
+        final_pages = []
+        for page in pages:
+            text = (page.original_text or "").strip()
+            if not text:
+                continue
+            if contains_tamil(text) and page.legal_english:
+                final_pages.append(f"Page {page.page_number}\n{page.legal_english}")
+            else:
+                final_pages.append(f"Page {page.page_number}\n{text}")
         return "\n\n".join(final_pages)
-      
-    async def process_document(self, request: DocumentRequest, document_id: str) -> str:
-        """Start document processing and return document ID"""
-        logger.info(f"Starting document processing: {document_id}")
+
+    async def process_document(
+        self, request: DocumentRequest, document_id: str, resume: bool = False, admitted: bool = False
+    ) -> str:
+        """
+        Start (or, with `resume`, continue) document processing and return
+        document ID. `admitted` skips the admission check for a document
+        whose whole batch was already checked by check_admission.
+        """
+        if config.JOB_QUEUE_ENABLED:
+            await self.enqueue_document(request, document_id, resume, admitted)
+            return document_id
+
+        # Raises QueueFullError when the document cannot even wait its turn
+        ticket = admission_controller.reserve(document_id, len(request.file_content or b""), checked=admitted)
+        logger.info(f"{'Resuming' if resume else 'Starting'} document processing: {document_id}")
         
         # Start processing in background
         task = asyncio.create_task(
-            self._process_document_async(document_id, request)
+            self._process_admitted(ticket, document_id, request, resume)
         )
         self.active_processes[document_id] = task
         
@@ -77,14 +132,185 @@ class DocumentProcessingService:
         
         return document_id
     
+    async def check_admission(self, size_bytes: int, count: int = 1):
+        """Raise QueueFullError unless `count` more documents can be accepted now"""
+        if not config.JOB_QUEUE_ENABLED:
+            admission_controller.check(size_bytes, count)
+            return
+
+        # Workers bound the documents processed at once; bound their backlog
+        queued = await asyncio.to_thread(JobRepository.count_queued)
+        if queued + count > config.MAX_QUEUED_DOCUMENTS:
+            raise QueueFullError(
+                "Processing queue is full",
+                admission_controller.estimated_wait(config.MAX_QUEUED_DOCUMENTS)
+            )
+
+    async def _process_admitted(self, ticket: Ticket, document_id: str, request: DocumentRequest, resume: bool):
+        """Wait for admission (reporting the queue position), then process"""
+        async def report_position(position: int):
+            await self.sse_manager.send_event(
+                document_id,
+                "queue_position",
+                {
+                    "status": ProcessingStatus.QUEUED,
+                    "position": position,
+                    "estimated_wait_seconds": admission_controller.estimated_wait(position)
+                }
+            )
+
+        try:
+            if not ticket.admitted:
+                # Recorded, so the resume loop picks the document up if this
+                # process stops before its turn comes
+                try:
+                    await asyncio.to_thread(OriginalFileRepository.update_processing, document_id, "queued")
+                except Exception as e:
+                    logger.warning(f"Could not record {document_id} as queued: {str(e)}")
+                heartbeat = asyncio.create_task(self._heartbeat(document_id))
+                try:
+                    await admission_controller.wait(ticket, report_position)
+                finally:
+                    heartbeat.cancel()
+            await self._process_document_async(document_id, request, resume)
+        finally:
+            admission_controller.release(ticket)
+
+    async def enqueue_document(
+        self, request: DocumentRequest, document_id: str, resume: bool = False, admitted: bool = False
+    ) -> bool:
+        """Hand a document to the worker processes; False if it is already queued or running"""
+        if not admitted:
+            await self.check_admission(0)
+        tenant, lane = current_tenant.get(), current_lane.get()
+        queued = await asyncio.to_thread(
+            JobRepository.enqueue,
+            document_id,
+            request.file_path,
+            request.file_type,
+            resume,
+            {"user_id": tenant.user_id, "bank_name": tenant.bank_name, "lane": lane},
+            admission_controller.order.weight(lane, tenant)
+        )
+        if not queued:
+            logger.info(f"Document {document_id} is already queued or being processed")
+            return False
+
+        logger.info(f"Queued document for processing: {document_id}")
+        await self.sse_manager.send_event(
+            document_id,
+            "status_update",
+            {"status": ProcessingStatus.QUEUED, "message": "Waiting for a worker"}
+        )
+        return True
+
+    async def process_job(self, job: dict):
+        """Run a queued document (called by the worker that leased `job`)"""
+        document_id = job["_id"]
+        if not await asyncio.to_thread(OriginalFileRepository.get_by_id, document_id):
+            logger.info(f"Skipping job for deleted document {document_id}")
+            return
+
+        request = DocumentRequest(file_path=job["file_path"], file_type=job["file_type"])
+        scheduling = job.get("scheduling") or {}
+        with scheduling_context(
+            scheduling.get("user_id"), scheduling.get("bank_name"), scheduling.get("lane", current_lane.get())
+        ):
+            # A failed attempt may be retried; the worker reports the failure
+            # once the job is dead-lettered
+            await self._process_document_async(
+                document_id, request, job.get("resume", False), report_failure=False
+            )
+    
+    def cancel_document(self, document_id: str):
+        """Stop a document this process is running or holding in its queue"""
+        task = self.active_processes.get(document_id)
+        if task:
+            task.cancel()
+
     def _cleanup_task(self, document_id: str, task: asyncio.Task):
         """Clean up completed task"""
         self.active_processes.pop(document_id, None)
-        if task.exception():
+        if not task.cancelled() and task.exception():
             logger.error(f"Task failed for document {document_id}: {task.exception()}")
     
-    async def _process_document_async(self, document_id: str, request: DocumentRequest):
-        """Async document processing pipeline"""
+    async def resume_document(self, document_id: str) -> bool:
+        """
+        Resume an unfinished document from its checkpoint, unless another
+        process is still heart-beating on it. Returns whether it was resumed.
+        """
+        if document_id in self.active_processes:
+            return False
+
+        if config.JOB_QUEUE_ENABLED:
+            # Workers hold leases on running jobs, so the queue decides
+            file_doc = await asyncio.to_thread(OriginalFileRepository.get_by_id, document_id)
+            return await self.enqueue_document(self._resume_request(file_doc), document_id, resume=True)
+
+        await self.check_admission(0)
+        stale_before = datetime.utcnow() - timedelta(seconds=config.PROCESSING_STALE_SECONDS)
+        if not await asyncio.to_thread(OriginalFileRepository.claim, document_id, stale_before):
+            return False
+
+        file_doc = await asyncio.to_thread(OriginalFileRepository.get_by_id, document_id)
+        await self.process_document(self._resume_request(file_doc), document_id, resume=True)
+        return True
+
+    async def resume_unfinished(self) -> int:
+        """Resume every document whose processing process stopped heart-beating"""
+        resumed = 0
+        stale_before = datetime.utcnow() - timedelta(seconds=config.PROCESSING_STALE_SECONDS)
+        while True:
+            try:
+                await self.check_admission(0)
+            except QueueFullError:
+                # The rest wait for the next round
+                return resumed
+            file_doc = await asyncio.to_thread(OriginalFileRepository.claim_stale, stale_before)
+            if not file_doc:
+                return resumed
+            # Background work: queued behind interactive uploads
+            with scheduling_context(str(file_doc.get("created_by") or ""), None, LANE_BULK):
+                await self.process_document(self._resume_request(file_doc), file_doc["id"], resume=True)
+            resumed += 1
+
+    async def run_resume_loop(self):
+        """Keep picking up documents abandoned by crashed or restarted processes"""
+        while True:
+            try:
+                resumed = await self.resume_unfinished()
+                if resumed:
+                    logger.info(f"Resumed {resumed} unfinished document(s)")
+            except Exception as e:
+                logger.error(f"Resuming unfinished documents failed: {str(e)}")
+            await asyncio.sleep(config.PROCESSING_STALE_SECONDS)
+
+    @staticmethod
+    def _resume_request(file_doc: dict) -> DocumentRequest:
+        return DocumentRequest(
+            file_path=file_doc.get("file_path"),
+            file_type="pdf" if file_doc.get("file_type") == "pdf" else "image"
+        )
+
+    async def _heartbeat(self, document_id: str):
+        """Tell other processes this document is alive while it is processed"""
+        while True:
+            await asyncio.sleep(config.PROCESSING_HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(OriginalFileRepository.heartbeat, document_id)
+            except Exception as e:
+                logger.warning(f"Heartbeat failed for {document_id}: {str(e)}")
+    
+    async def _process_document_async(
+        self, document_id: str, request: DocumentRequest, resume: bool = False, report_failure: bool = True
+    ):
+        """
+        Async document processing pipeline. Every completed page is a
+        checkpoint: when resuming, stored pages are neither OCR'd nor
+        translated again. With `report_failure` off, an error is raised
+        without marking the document failed.
+        """
+        heartbeat = asyncio.create_task(self._heartbeat(document_id))
         try:
             # Fetch file from repository
             file_doc = OriginalFileRepository.get_by_id(document_id)
@@ -93,117 +319,203 @@ class DocumentProcessingService:
 
             file_path = file_doc["file_path"]
 
+            # Small uploads are OCR'd from the bytes already in memory; large
+            # ones are read (or memory-mapped) from disk by the OCR workers
+            ocr_input = file_path
+            if (
+                request.file_content
+                and len(request.file_content) < config.OCR_MMAP_THRESHOLD_MB * 1024 * 1024
+            ):
+                ocr_input = request.file_content
+
+            await asyncio.to_thread(
+                OriginalFileRepository.update_processing, document_id, "processing", stage="pages"
+            )
+
+            # Pages finished before an interruption, by page number
+            stored_pages: Dict[int, PageData] = {}
+            if resume:
+                stored_pages = {
+                    page.page_number: page
+                    for page in await asyncio.to_thread(DocumentPageRepository.get_by_document, document_id)
+                }
+            done_pages = {
+                page_num: OCRPage(
+                    page_num,
+                    page.original_text or "",
+                    page.extraction_method or SOURCE_OCR,
+                    image_hash=page.image_hash
+                )
+                for page_num, page in stored_pages.items()
+            }
+
             # Step 1: OCR Extraction
             await self.sse_manager.send_event(
                 document_id,
                 "status_update",
-                {"status": ProcessingStatus.OCR_STARTED, "message": "Starting OCR extraction"}
+                {
+                    "status": ProcessingStatus.OCR_STARTED,
+                    "message": (
+                        f"Resuming with {len(stored_pages)} pages already done" if resume
+                        else "Starting OCR extraction"
+                    ),
+                    "resumed": resume,
+                    "pages_restored": len(stored_pages)
+                }
             )
 
+            # Step 2: Process each page as soon as the OCR stage releases it
+            page_results = []
+            pages_extracted = 0
+            # Pages served from the embedded text layer vs. raster OCR, and
+            # adaptive-DPI pages that needed the high-resolution re-scan
+            extraction_counts = {"text_layer": 0, "ocr": 0, "blank": 0, "rescanned": 0}
+            # Seconds per preprocessing step and OCR, summed over the pages OCR'd now
+            ocr_timings: Dict[str, float] = {}
+            # Pages are translated concurrently (translation of one page
+            # overlaps simplification of another) but emitted in page order
+            slots = asyncio.Semaphore(config.PAGE_TRANSLATION_CONCURRENCY)
+            # Packs small pages into shared requests and chunks oversize ones
+            batcher = PageBatcher(self.translation_service, slots)
+            window = config.PAGE_TRANSLATION_CONCURRENCY * 2 + config.LLM_BATCH_MAX_PAGES
+            pending = deque()
+            pages_translated = 0
+            # Completed pages not yet written; stored in bulk every few pages
+            unsaved_pages: List[PageData] = []
+            # Pages that failed to process or to be stored; the document
+            # ends up partial and a resume retries them
+            failed_pages: List[int] = []
+
+            async def save_pages():
+                batch = unsaved_pages[:]
+                unsaved_pages.clear()
+                try:
+                    await asyncio.to_thread(
+                        DocumentPageRepository.bulk_upsert, document_id, file_doc["report_id"], batch
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to store pages for {document_id}: {str(e)}")
+                    failed_pages.extend(page.page_number for page in batch)
+
+            async def run_page(page: OCRPage) -> Optional[PageData]:
+                nonlocal pages_translated
+                result = await self._process_page(document_id, page, batcher)
+                pages_translated += 1
+                await self.sse_manager.send_event(
+                    document_id,
+                    "page_progress",
+                    {
+                        "page_number": page.page_number,
+                        "pages_completed": pages_translated,
+                        "pages_extracted": pages_extracted
+                    }
+                )
+                return result
+
+            async def emit_next():
+                page, task = pending.popleft()
+                page_data = await task
+                if page_data is None:
+                    failed_pages.append(page.page_number)
+                    return
+                page_results.append(page_data)
+                restored = page.page_number in stored_pages
+                if not restored:
+                    unsaved_pages.append(page_data)
+                if len(unsaved_pages) >= config.PAGE_PERSIST_BATCH_SIZE:
+                    await save_pages()
+
+                await self.sse_manager.send_event(
+                    document_id,
+                    "page_completed",
+                    {
+                        "page_number": page.page_number,
+                        "status": "completed",
+                        "extraction_method": page.source,
+                        "ocr_dpi": page.dpi,
+                        "ocr_confidence": page.confidence,
+                        "restored": restored
+                    }
+                )
+
             try:
-                if request.file_type == "pdf":
-                    pages = self.ocr_service.extract_text_from_pdf(file_path)
-                else:
-                    pages = self.ocr_service.extract_text_from_image(file_path)
+                async for page in self.ocr_service.stream_pages(
+                    ocr_input, request.file_type, done_pages=done_pages
+                ):
+                    pages_extracted += 1
+                    extraction_counts[page.source] += 1
+                    if page.rescanned:
+                        extraction_counts["rescanned"] += 1
+                    for step, seconds in (page.timings or {}).items():
+                        ocr_timings[step] = ocr_timings.get(step, 0.0) + seconds
 
-            except Exception as e:
-                logger.error(f"OCR extraction failed for {document_id}: {str(e)}")
-                raise Exception(f"OCR extraction failed: {str(e)}")
+                    checkpoint = stored_pages.get(page.page_number)
+                    if checkpoint is not None:
+                        # Completed before the interruption; nothing to redo
+                        task = asyncio.get_running_loop().create_future()
+                        task.set_result(checkpoint)
+                    else:
+                        # Bounds the pages in flight across all documents
+                        await admission_controller.acquire_page()
+                        task = asyncio.create_task(run_page(page))
+                        task.add_done_callback(admission_controller.release_page)
+                    pending.append((page, task))
+
+                    # Emit finished pages in order; stop reading OCR output
+                    # while too many pages are waiting
+                    while pending and (pending[0][1].done() or len(pending) >= window):
+                        await emit_next()
+
+                # No more pages will join a batch
+                batcher.flush()
+                while pending:
+                    await emit_next()
+                await save_pages()
+                await asyncio.to_thread(DocumentPageRepository.delete_after, document_id, pages_extracted)
+            finally:
+                for _, task in pending:
+                    task.cancel()
+                batcher.cancel()
+                if unsaved_pages:
+                    # Keep the pages finished before an error or cancellation
+                    # so a resume does not translate them again
+                    await asyncio.shield(save_pages())
             
             await self.sse_manager.send_event(
                 document_id,
                 "status_update",
                 {
                     "status": ProcessingStatus.OCR_COMPLETED,
-                    "message": f"OCR completed. Extracted {len(pages)} pages",
-                    "pages_extracted": len(pages)
+                    "message": f"OCR completed. Extracted {pages_extracted} pages",
+                    "pages_extracted": pages_extracted,
+                    "text_layer_pages": extraction_counts["text_layer"],
+                    "ocr_pages": extraction_counts["ocr"],
+                    "rescanned_pages": extraction_counts["rescanned"],
+                    "blank_pages": extraction_counts["blank"],
+                    "ocr_timings": {step: round(seconds, 3) for step, seconds in ocr_timings.items()}
                 }
             )
+            logger.info(
+                f"Extraction for {document_id}: {extraction_counts['text_layer']} text layer, "
+                f"{extraction_counts['ocr']} OCR ({extraction_counts['rescanned']} re-scanned at high DPI), "
+                f"{extraction_counts['blank']} blank, "
+                f"timings: {ocr_timings}"
+            )
             
-            # Step 2: Process each page
-            page_results = []
-            for page_num, text in pages:
-                try:
-                    await self.sse_manager.send_event(
-                        document_id,
-                        "page_started",
-                        {"page_number": page_num, "status": "processing"}
-                    )
-                    
-                    # Translation
-                    await self.sse_manager.send_event(
-                        document_id,
-                        "status_update",
-                        {
-                            "status": ProcessingStatus.TRANSLATION_STARTED,
-                            "message": f"Translating page {page_num}",
-                            "page_number": page_num
-                        }
-                    )
-                    
-                    legal_english = await self.translation_service.translate_to_legal_english(
-                        text, page_num
-                    )
-                    
-                    await self.sse_manager.send_event(
-                        document_id,
-                        "status_update",
-                        {
-                            "status": ProcessingStatus.TRANSLATION_COMPLETED,
-                            "message": f"Translation completed for page {page_num}",
-                            "page_number": page_num
-                        }
-                    )
-                    
-                    # Simplification
-                    await self.sse_manager.send_event(
-                        document_id,
-                        "status_update",
-                        {
-                            "status": ProcessingStatus.SIMPLIFICATION_STARTED,
-                            "message": f"Simplifying page {page_num}",
-                            "page_number": page_num
-                        }
-                    )
-                    
-                    simple_english = await self.translation_service.simplify_text(
-                        legal_english, page_num
-                    )
-                    
-                    await self.sse_manager.send_event(
-                        document_id,
-                        "status_update",
-                        {
-                            "status": ProcessingStatus.SIMPLIFICATION_COMPLETED,
-                            "message": f"Simplification completed for page {page_num}",
-                            "page_number": page_num
-                        }
-                    )
-                    
-                    page_data = PageData(
-                        page_number=page_num,
-                        original_text=text,
-                        legal_english=legal_english,
-                        simple_english=simple_english,
-                        status=ProcessingStatus.COMPLETED
-                    )
-                    page_results.append(page_data)
-                    
-                    await self.sse_manager.send_event(
-                        document_id,
-                        "page_completed",
-                        {"page_number": page_num, "status": "completed"}
-                    )
-                
-                except Exception as e:
-                    logger.error(f"Error processing page {page_num} for {document_id}: {str(e)}")
-                    await self.sse_manager.send_event(
-                        document_id,
-                        "page_error",
-                        {"page_number": page_num, "error": str(e)}
-                    )
-                    # Continue with other pages
+            logger.info(
+                f"LLM requests for {document_id}: {batcher.stats['requests']} "
+                f"({batcher.stats['batched_pages']} pages batched, {batcher.stats['chunked_pages']} chunked, "
+                f"{batcher.stats['requests_saved']} requests and ~{batcher.stats['tokens_saved']} prompt tokens saved)"
+            )
             
+            await asyncio.to_thread(
+                OriginalFileRepository.update_processing,
+                document_id,
+                "processing",
+                pages_extracted,
+                stage="summary"
+            )
+
             # Step 3: Create summary
             await self.sse_manager.send_event(
                 document_id,
@@ -216,32 +528,229 @@ class DocumentProcessingService:
             except Exception as e:
                 logger.error(f"Summary creation failed for {document_id}: {str(e)}")
                 summary = "Summary creation failed"
+
+            # Pages that failed are not stored, so the document is only
+            # partly done; it is not reused for imports and can be resumed
+            failed_pages = sorted(set(failed_pages))
+            status = ProcessingStatus.PARTIAL if failed_pages else ProcessingStatus.COMPLETED
+            await asyncio.to_thread(
+                OriginalFileRepository.update_processing,
+                document_id,
+                status.value,
+                pages_extracted,
+                summary,
+                stage="done",
+                failed_pages=failed_pages
+            )
             
             await self.sse_manager.send_event(
                 document_id,
                 "status_update",
                 {
-                    "status": ProcessingStatus.COMPLETED,
-                    "message": "Document processing completed",
+                    "status": status,
+                    "message": (
+                        f"Document processed with {len(failed_pages)} failed page(s)" if failed_pages
+                        else "Document processing completed"
+                    ),
                     "summary": summary,
-                    "total_pages": len(page_results)
+                    "total_pages": len(page_results),
+                    "failed_pages": failed_pages,
+                    "llm_requests": batcher.stats
                 }
             )
             
-            logger.info(f"Document processing completed successfully: {document_id}")
+            if failed_pages:
+                logger.warning(f"Document {document_id} processed with failed pages: {failed_pages}")
+            else:
+                logger.info(f"Document processing completed successfully: {document_id}")
             
         except Exception as e:
             logger.error(f"Document processing failed for {document_id}: {str(e)}", exc_info=True)
+            if report_failure:
+                await self.report_failure(document_id, str(e))
+            raise
+        finally:
+            heartbeat.cancel()
+
+    async def report_failure(self, document_id: str, error: str):
+        """Mark a document failed and tell its listeners processing has ended"""
+        try:
+            await asyncio.to_thread(OriginalFileRepository.update_processing, document_id, "failed")
+        except Exception:
+            logger.error(f"Could not record failure for {document_id}", exc_info=True)
+        await self.sse_manager.send_event(
+            document_id,
+            "error",
+            {
+                "status": ProcessingStatus.FAILED,
+                "message": f"Processing failed: {error}"
+            }
+        )
+    
+    async def _process_page(
+        self,
+        document_id: str,
+        page: OCRPage,
+        batcher: PageBatcher
+    ) -> Optional[PageData]:
+        """Translate and simplify one page. Returns None when the page failed."""
+        page_num, text, source = page.page_number, page.text, page.source
+        try:
+            if source == SOURCE_BLANK or not text.strip():
+                # Nothing to translate
+                await self.sse_manager.send_event(
+                    document_id,
+                    "page_started",
+                    {"page_number": page_num, "status": "processing"}
+                )
+                legal_english, simple_english = "", ""
+            else:
+                await self.sse_manager.send_event(
+                    document_id,
+                    "page_started",
+                    {"page_number": page_num, "status": "processing"}
+                )
+                legal_english, simple_english = await self._translate_page(
+                    document_id, page_num, text, batcher
+                )
+
+            page_data = PageData(
+                page_number=page_num,
+                original_text=text,
+                legal_english=legal_english,
+                simple_english=simple_english,
+                extraction_method=source,
+                image_hash=page.image_hash,
+                status=ProcessingStatus.COMPLETED
+            )
+            return page_data
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing page {page_num} for {document_id}: {str(e)}")
             await self.sse_manager.send_event(
                 document_id,
-                "error",
-                {
-                    "status": ProcessingStatus.FAILED,
-                    "message": f"Processing failed: {str(e)}"
-                }
+                "page_error",
+                {"page_number": page_num, "error": str(e)}
             )
-            raise
-    
+            # Continue with other pages
+            return None
+
+    def _page_delta_sender(self, document_id: str, page_num: int, field: str):
+        """Callback forwarding streamed text of one page field as page_delta events"""
+        if not config.LLM_STREAMING:
+            return None
+
+        async def send(delta: str):
+            await self.sse_manager.send_event(
+                document_id,
+                "page_delta",
+                {"page_number": page_num, "field": field, "delta": delta}
+            )
+        return send
+
+    async def _translate_page(
+        self,
+        document_id: str,
+        page_num: int,
+        text: str,
+        batcher: PageBatcher
+    ) -> Tuple[str, str]:
+        """Translate a page to legal English, then simplify it"""
+        if config.TRANSLATION_MODE == "combined":
+            return await self._translate_page_combined(document_id, page_num, text, batcher)
+
+        # Translation
+        await self.sse_manager.send_event(
+            document_id,
+            "status_update",
+            {
+                "status": ProcessingStatus.TRANSLATION_STARTED,
+                "message": f"Translating page {page_num}",
+                "page_number": page_num
+            }
+        )
+        
+        legal_english = await batcher.translate(
+            page_num, text, self._page_delta_sender(document_id, page_num, "legal_english")
+        )
+        
+        await self.sse_manager.send_event(
+            document_id,
+            "status_update",
+            {
+                "status": ProcessingStatus.TRANSLATION_COMPLETED,
+                "message": f"Translation completed for page {page_num}",
+                "page_number": page_num
+            }
+        )
+        
+        # Simplification
+        await self.sse_manager.send_event(
+            document_id,
+            "status_update",
+            {
+                "status": ProcessingStatus.SIMPLIFICATION_STARTED,
+                "message": f"Simplifying page {page_num}",
+                "page_number": page_num
+            }
+        )
+        
+        simple_english = await batcher.simplify(
+            page_num, legal_english, self._page_delta_sender(document_id, page_num, "simple_english")
+        )
+        
+        await self.sse_manager.send_event(
+            document_id,
+            "status_update",
+            {
+                "status": ProcessingStatus.SIMPLIFICATION_COMPLETED,
+                "message": f"Simplification completed for page {page_num}",
+                "page_number": page_num
+            }
+        )
+
+        return legal_english, simple_english
+
+    async def _translate_page_combined(
+        self,
+        document_id: str,
+        page_num: int,
+        text: str,
+        batcher: PageBatcher
+    ) -> Tuple[str, str]:
+        """Legal and simple English for a page from one structured call"""
+        await self.sse_manager.send_event(
+            document_id,
+            "status_update",
+            {
+                "status": ProcessingStatus.TRANSLATION_STARTED,
+                "message": f"Translating and simplifying page {page_num}",
+                "page_number": page_num
+            }
+        )
+
+        legal_english, simple_english = await batcher.translate_and_simplify(page_num, text)
+
+        # A structured reply arrives whole, so each field is sent as one delta
+        for field, value in (("legal_english", legal_english), ("simple_english", simple_english)):
+            send_delta = self._page_delta_sender(document_id, page_num, field)
+            if send_delta:
+                await send_delta(value)
+
+        for status, message in (
+            (ProcessingStatus.TRANSLATION_COMPLETED, f"Translation completed for page {page_num}"),
+            (ProcessingStatus.SIMPLIFICATION_COMPLETED, f"Simplification completed for page {page_num}"),
+        ):
+            await self.sse_manager.send_event(
+                document_id,
+                "status_update",
+                {"status": status, "message": message, "page_number": page_num}
+            )
+
+        return legal_english, simple_english
+
     def get_sse_stream(self, document_id: str):
         """Get SSE stream for document updates"""
         logger.info(f"Establishing SSE stream for document: {document_id}")
@@ -0,0 +1,63 @@
+"""
+Local token counting for OpenAI models (tiktoken).
+
+tiktoken downloads its encoding files on first use and keeps them in
+TIKTOKEN_CACHE_DIR; hosts without network access need that directory
+pre-seeded. When an encoding cannot be loaded, tokens are estimated from
+the character count instead.
+"""
+
+from typing import Dict, List, Union
+import logging
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# Characters per token of the fallback estimate. Tamil script takes
+# several tokens per word, so this errs towards counting too many
+FALLBACK_CHARS_PER_TOKEN = 2
+
+
+class CharEstimateEncoding:
+    """Stand-in encoding whose "tokens" are fixed-size runs of characters"""
+
+    name = "char-estimate"
+
+    def encode(self, text: str) -> List[str]:
+        return [
+            text[start:start + FALLBACK_CHARS_PER_TOKEN]
+            for start in range(0, len(text), FALLBACK_CHARS_PER_TOKEN)
+        ]
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+# Tokenizers by model name
+_encodings: Dict[str, Union["tiktoken.Encoding", CharEstimateEncoding]] = {}
+
+
+def get_encoding(model: str) -> Union["tiktoken.Encoding", CharEstimateEncoding]:
+    if model not in _encodings:
+        try:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            # Usually the encoding file could not be downloaded
+            logger.warning(
+                f"Could not load the tiktoken encoding for {model} ({e}); "
+                f"estimating tokens from characters. Pre-seed TIKTOKEN_CACHE_DIR to avoid this"
+            )
+            _encodings[model] = CharEstimateEncoding()
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str) -> int:
+    return len(get_encoding(model).encode(text))
+
+
+def count_message_tokens(messages: List[dict], model: str) -> int:
+    """Prompt tokens of a chat request, including per-message framing"""
+    return sum(count_tokens(message["content"], model) + 4 for message in messages) + 3
@@ -0,0 +1,92 @@
+"""
+LLM result cache for translation, simplification and summaries.
+
+Keys hash the normalized input text together with the task, model and
+prompt-template version, so re-uploads and the same deed attached to
+several reports reuse earlier outputs, while a prompt change starts a
+fresh set of entries. Lookups go to an in-memory LRU first, then MongoDB,
+where entries expire after TRANSLATION_CACHE_TTL_DAYS.
+"""
+
+from typing import Dict, Optional
+import asyncio
+import hashlib
+import logging
+import unicodedata
+
+from app.core.cache import LRUCache
+from app.core.config import config
+from app.repositories.cache_repo import TranslationCacheRepository
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """NFC-normalize and collapse whitespace so OCR layout noise does not miss the cache"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TranslationCache:
+    def __init__(self):
+        self.memory = LRUCache(max_bytes=config.TRANSLATION_CACHE_MEMORY_MB * 1024 * 1024)
+        self.persistent = config.TRANSLATION_CACHE_PERSISTENT
+        self.counters = {"memory_hits": 0, "persistent_hits": 0, "misses": 0}
+        self._indexed = False
+
+    @staticmethod
+    def make_key(kind: str, text: str, model: str, prompt_version: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{kind}:{model}:{prompt_version}:{digest}"
+
+    def _ensure_indexes(self):
+        if self._indexed:
+            return
+        self._indexed = True
+        TranslationCacheRepository.ensure_indexes(config.TRANSLATION_CACHE_TTL_DAYS * 24 * 3600)
+
+    async def get(self, key: str) -> Optional[str]:
+        output = self.memory.get(key)
+        if output is not None:
+            self.counters["memory_hits"] += 1
+            return output
+
+        doc = None
+        if self.persistent:
+            try:
+                doc = await asyncio.to_thread(TranslationCacheRepository.get, key)
+            except Exception as e:
+                logger.warning(f"Translation cache lookup failed: {e}")
+
+        if doc is None or "output" not in doc:
+            self.counters["misses"] += 1
+            return None
+
+        self.counters["persistent_hits"] += 1
+        self.memory.set(key, doc["output"])
+        return doc["output"]
+
+    async def set(self, key: str, kind: str, output: str):
+        self.memory.set(key, output)
+
+        if not self.persistent:
+            return
+
+        try:
+            await asyncio.to_thread(self._ensure_indexes)
+            await asyncio.to_thread(TranslationCacheRepository.set, key, kind, output)
+        except Exception as e:
+            logger.warning(f"Translation cache write failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.counters["memory_hits"] + self.counters["persistent_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.total_bytes
+        }
+
+
+# Shared by every TranslationService instance
+translation_cache = TranslationCache()
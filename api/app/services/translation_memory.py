@@ -0,0 +1,130 @@
+"""
+Clause-level translation memory.
+
+Deeds, pattas and encumbrance certificates repeat the same clauses with
+only names, survey numbers and boundaries changed. OCR text is split into
+segments, and a segment whose normalized text (Unicode NFC, collapsed
+whitespace) was translated before reuses that translation, so only novel
+segments need the model. Only exact matches are reused: a clause that
+differs by one name or number is a different clause.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional
+import hashlib
+import logging
+import re
+import threading
+
+from app.core.config import config
+from app.repositories.cache_repo import TranslationMemoryRepository
+from app.services.translation_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Clause boundaries: sentence punctuation followed by whitespace
+_CLAUSE_END = re.compile(r"(?<=[.;:!?])\s+")
+
+
+class Segment(NamedTuple):
+    # Index of the paragraph the segment belongs to, for reassembly
+    paragraph: int
+    text: str
+
+
+class MemoryEntry(NamedTuple):
+    source: str
+    translation: str
+
+
+def split_segments(text: str) -> List[Segment]:
+    """Split OCR text into clause-sized segments, paragraph by paragraph"""
+    segments = []
+    paragraphs = [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+    for index, paragraph in enumerate(paragraphs):
+        for clause in _CLAUSE_END.split(" ".join(paragraph.split())):
+            if clause:
+                segments.append(Segment(index, clause))
+    return segments
+
+
+def join_segments(segments: List[Segment], translations: List[str]) -> str:
+    """Reassemble translated segments with the source paragraph breaks"""
+    paragraphs: "OrderedDict[int, List[str]]" = OrderedDict()
+    for segment, translation in zip(segments, translations):
+        paragraphs.setdefault(segment.paragraph, []).append(translation.strip())
+    return "\n\n".join(" ".join(parts) for parts in paragraphs.values())
+
+
+class TranslationMemory:
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+
+        self.entries: "OrderedDict[str, MemoryEntry]" = OrderedDict()
+        self.counters = {"reused_segments": 0, "translated_segments": 0}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def entry_id(text: str) -> str:
+        return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+    def _add(self, entry_id: str, source: str, translation: str):
+        if entry_id in self.entries:
+            self.entries.move_to_end(entry_id)
+            return
+
+        self.entries[entry_id] = MemoryEntry(source, translation)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load(self):
+        """Fill the index from MongoDB once per process"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                for doc in TranslationMemoryRepository.get_recent(self.max_entries):
+                    self._add(doc["_id"], doc["source"], doc["translation"])
+            except Exception as e:
+                logger.warning(f"Translation memory load failed: {e}")
+
+    def lookup(self, text: str) -> Optional[str]:
+        """Translation of a stored segment with the same normalized text as `text`"""
+        if len(text) < config.TRANSLATION_MEMORY_MIN_SEGMENT_CHARS:
+            return None
+
+        entry_id = self.entry_id(text)
+        with self._lock:
+            entry = self.entries.get(entry_id)
+            if entry is None:
+                return None
+            self.entries.move_to_end(entry_id)
+            return entry.translation
+
+    def add(self, source: str, translation: str, model: str):
+        """Remember a segment translation (in memory and in MongoDB)"""
+        if len(source) < config.TRANSLATION_MEMORY_MIN_SEGMENT_CHARS or not translation.strip():
+            return
+
+        entry_id = self.entry_id(source)
+        with self._lock:
+            self._add(entry_id, source, translation)
+
+        try:
+            TranslationMemoryRepository.add(entry_id, source, translation, model)
+        except Exception as e:
+            logger.warning(f"Translation memory write failed: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        total = self.counters["reused_segments"] + self.counters["translated_segments"]
+        return {
+            **self.counters,
+            "reuse_rate": round(self.counters["reused_segments"] / total, 4) if total else 0.0,
+            "entries": len(self.entries)
+        }
+
+
+# Shared by every TranslationService instance
+translation_memory = TranslationMemory(max_entries=config.TRANSLATION_MEMORY_MAX_ENTRIES)
@@ -1,21 +1,29 @@
-from openai import OpenAI
-from typing import Dict, List
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 import asyncio
+import json
+import logging
 import os
-from app.models.report import PageData, ProcessingStatus
+import re
+from app.core.config import config
+from pydantic import ValidationError
+from app.models.report import PageData, PageTranslation, ProcessingStatus
+from app.services.openai_client import chat_completion, stream_chat_completion
+from app.services.tokenizer import count_tokens, get_encoding
+from app.services.translation_cache import translation_cache
+from app.services.translation_memory import join_segments, split_segments, translation_memory
 
-class TranslationService:
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
-        self.client = OpenAI(api_key=api_key)
-        self.model = model
-    
-    async def translate_to_legal_english(self, tamil_text: str, page_num: int) -> str:
-        """Translate Tamil text to legal English"""
-        prompt = f"""
-        Translate this Tamil land document text to formal legal English:
-        
-        {tamil_text}
-        
+logger = logging.getLogger(__name__)
+
+# Receives partial output text while a completion streams
+DeltaCallback = Callable[[str], Awaitable[None]]
+
+# One complete "number": "translation" entry of a streamed segment reply
+_SEGMENT_ENTRY = re.compile(r'"(\d+)"\s*:\s*("(?:[^"\\]|\\.)*")')
+
+TRANSLATOR_ROLE = "You are an expert legal translator specializing in Tamil land documents."
+SIMPLIFIER_ROLE = "You simplify complex legal documents for common people."
+
+TRANSLATION_REQUIREMENTS = """
         Requirements:
         1. Preserve all legal terminology
         2. Maintain original names in transliterated form
@@ -23,51 +31,500 @@ class TranslationService:
         4. Include survey numbers, boundaries, dates
         5. Output in clear legal English
         """
-        
-        response = await asyncio.to_thread(
-            self.client.chat.completions.create,
+
+SIMPLIFICATION_REQUIREMENTS = """
+        Include:
+        1. A short summary for this page
+        2. Key details (owner, land size, survey number, boundaries)
+        3. Explanation of any technical terms
+        4. Use bullet points for clarity
+        """
+
+
+# Strict JSON schema for the combined translate+simplify reply
+PAGE_TRANSLATION_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "page_translation",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "legal_english": {"type": "string"},
+                "simple_english": {"type": "string"}
+            },
+            "required": ["legal_english", "simple_english"],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+def split_chunks(text: str, max_tokens: int, model: str) -> List[str]:
+    """Split text into chunks of at most max_tokens, on line boundaries where possible"""
+    encoding = get_encoding(model)
+    chunks, current, current_tokens = [], [], 0
+    for line in text.splitlines():
+        tokens = len(encoding.encode(line)) + 1
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        if tokens > max_tokens:
+            # A single oversize line is cut on token boundaries
+            ids = encoding.encode(line)
+            for start in range(0, len(ids), max_tokens):
+                chunks.append(encoding.decode(ids[start:start + max_tokens]))
+            continue
+        current.append(line)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+class TranslationService:
+    # Bump when a prompt template changes so cached outputs are not reused
+    PROMPT_VERSION = "4"
+
+    def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
+        self.api_key = api_key
+        self.model = model
+
+    async def _complete(
+        self,
+        system_prompt: str,
+        prompt: str,
+        temperature: float,
+        response_format: Optional[dict] = None,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
+        """
+        Send one chat completion through the shared async client. With
+        `on_delta`, the completion is streamed and partial text is passed
+        on in chunks of about LLM_STREAM_CHUNK_CHARS (or whatever arrived
+        within LLM_STREAM_FLUSH_MS).
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        if on_delta is None:
+            return await chat_completion(
+                messages=messages,
+                model=self.model,
+                temperature=temperature,
+                api_key=self.api_key,
+                response_format=response_format
+            )
+
+        loop = asyncio.get_running_loop()
+        parts, pending, last_flush = [], "", loop.time()
+        async for delta in stream_chat_completion(
+            messages=messages,
             model=self.model,
-            messages=[
-                {"role": "system", "content": "You are an expert legal translator specializing in Tamil land documents."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2
+            temperature=temperature,
+            api_key=self.api_key
+        ):
+            parts.append(delta)
+            pending += delta
+            if (
+                len(pending) >= config.LLM_STREAM_CHUNK_CHARS
+                or loop.time() - last_flush >= config.LLM_STREAM_FLUSH_MS / 1000
+            ):
+                await on_delta(pending)
+                pending, last_flush = "", loop.time()
+        if pending:
+            await on_delta(pending)
+
+        return "".join(parts).strip()
+
+    async def _cached(
+        self,
+        kind: str,
+        source_text: str,
+        produce: Callable[[], Awaitable[str]],
+        on_delta: Optional[DeltaCallback] = None,
+        streamed: bool = False
+    ) -> str:
+        """
+        Return the cached output for this input, or produce it and cache it.
+        Output that did not stream through `on_delta` (cache hits, or a
+        producer with `streamed=False`) is passed to it whole.
+        """
+        key = translation_cache.make_key(kind, source_text, self.model, self.PROMPT_VERSION)
+        cached = await translation_cache.get(key)
+        if cached is not None:
+            if on_delta:
+                await on_delta(cached)
+            return cached
+
+        output = await produce()
+        await translation_cache.set(key, kind, output)
+        if on_delta and not streamed:
+            await on_delta(output)
+        return output
+
+    async def _cached_complete(
+        self,
+        kind: str,
+        source_text: str,
+        system_prompt: str,
+        prompt: str,
+        temperature: float,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
+        return await self._cached(
+            kind,
+            source_text,
+            lambda: self._complete(system_prompt, prompt, temperature, on_delta=on_delta),
+            on_delta=on_delta,
+            streamed=True
         )
+    
+    @staticmethod
+    def cache_kind(kind: str) -> str:
+        """
+        Cache namespace of a step's output. With the translation memory on,
+        translations are assembled segment by segment, whether the page was
+        sent alone or in a batch.
+        """
+        if kind == "translate" and config.TRANSLATION_MEMORY_ENABLED:
+            return "translate-segments"
+        return kind
+
+    async def translate_to_legal_english(
+        self,
+        tamil_text: str,
+        page_num: int,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
+        """Translate Tamil text to legal English"""
+        if config.TRANSLATION_MEMORY_ENABLED:
+            # Streamed segment by segment as the JSON reply completes each one
+            async def produce() -> str:
+                return (await self._translate_with_memory([tamil_text], on_delta))[0]
+
+            return await self._cached(
+                self.cache_kind("translate"), tamil_text, produce, on_delta=on_delta, streamed=True
+            )
+
+        return await self._cached_complete(
+            "translate",
+            tamil_text,
+            TRANSLATOR_ROLE,
+            self._translation_prompt(tamil_text),
+            temperature=0.2,
+            on_delta=on_delta
+        )
+
+    @staticmethod
+    def _translation_prompt(tamil_text: str) -> str:
+        return f"""
+        Translate this Tamil land document text to formal legal English:
+        
+        {tamil_text}
+        {TRANSLATION_REQUIREMENTS}"""
+
+    async def _translate_with_memory(
+        self,
+        texts: List[str],
+        on_delta: Optional[DeltaCallback] = None
+    ) -> List[str]:
+        """
+        Translate pages segment by segment: boilerplate clauses found in the
+        translation memory are reused, the novel segments of all `texts` go
+        to the model in one request, and their translations are added to
+        the memory. With `on_delta`, the first page's translation is passed
+        on in order as each of its segments becomes available.
+        """
+        await asyncio.to_thread(translation_memory.load)
+
+        pages = [split_segments(text) for text in texts]
+        translations = [[translation_memory.lookup(segment.text) for segment in page] for page in pages]
+        novel = [
+            (page, i)
+            for page, page_translations in enumerate(translations)
+            for i, translation in enumerate(page_translations) if translation is None
+        ]
+
+        translation_memory.counters["reused_segments"] += sum(map(len, pages)) - len(novel)
+        translation_memory.counters["translated_segments"] += len(novel)
+
+        emitted = 0
+
+        async def emit_ready():
+            # Same separators as join_segments, so the deltas add up to its output
+            nonlocal emitted
+            if on_delta is None or not pages:
+                return
+            segments, page_translations = pages[0], translations[0]
+            while emitted < len(segments) and page_translations[emitted] is not None:
+                separator = ""
+                if emitted:
+                    separator = " " if segments[emitted].paragraph == segments[emitted - 1].paragraph else "\n\n"
+                await on_delta(separator + page_translations[emitted].strip())
+                emitted += 1
+
+        async def store(index: int, output: str):
+            page, i = novel[index]
+            if translations[page][i] is not None:
+                return
+            translations[page][i] = output
+            await asyncio.to_thread(translation_memory.add, pages[page][i].text, output, self.model)
+            await emit_ready()
+
+        await emit_ready()
+        if novel:
+            await self._translate_segments(
+                [pages[page][i].text for page, i in novel], store, stream=on_delta is not None
+            )
+
+            # Segments the reply left out are translated one by one
+            missing = [index for index, (page, i) in enumerate(novel) if translations[page][i] is None]
+            if missing:
+                logger.warning(f"Segment translation reply lacked {len(missing)} of {len(novel)} segments")
+                outputs = await asyncio.gather(*(
+                    self._complete(
+                        TRANSLATOR_ROLE,
+                        self._translation_prompt(pages[novel[index][0]][novel[index][1]].text),
+                        temperature=0.2
+                    )
+                    for index in missing
+                ))
+                for index, output in zip(missing, outputs):
+                    await store(index, output)
+
+        return [join_segments(page, page_translations) for page, page_translations in zip(pages, translations)]
+
+    async def _translate_segments(
+        self,
+        texts: List[str],
+        on_segment: Callable[[int, str], Awaitable[None]],
+        stream: bool = False
+    ):
+        """
+        Translate numbered segments in one request, passing each usable
+        translation to `on_segment` with its index in `texts`. Streamed
+        replies are parsed as they arrive, so segments are delivered as soon
+        as their JSON value is complete.
+        """
+        numbered = {str(i + 1): text for i, text in enumerate(texts)}
+        prompt = f"""
+        Translate each numbered segment of this Tamil land document to formal legal English.
+        The segments are consecutive clauses of the document; translate every segment on its own.
         
-        return response.choices[0].message.content.strip()
+        {json.dumps(numbered, ensure_ascii=False, indent=2)}
+        {TRANSLATION_REQUIREMENTS}
+        Return a JSON object mapping every segment number to its translation.
+        """
+        messages = [
+            {"role": "system", "content": TRANSLATOR_ROLE},
+            {"role": "user", "content": prompt}
+        ]
+
+        async def deliver(number: str, translation) -> None:
+            if number in numbered and isinstance(translation, str):
+                await on_segment(int(number) - 1, translation)
+
+        if not stream:
+            reply = await chat_completion(
+                messages=messages,
+                model=self.model,
+                temperature=0.2,
+                api_key=self.api_key,
+                response_format={"type": "json_object"}
+            )
+        else:
+            reply, parsed_to = "", 0
+            async for delta in stream_chat_completion(
+                messages=messages,
+                model=self.model,
+                temperature=0.2,
+                api_key=self.api_key,
+                response_format={"type": "json_object"}
+            ):
+                reply += delta
+                for match in _SEGMENT_ENTRY.finditer(reply, parsed_to):
+                    parsed_to = match.end()
+                    await deliver(match.group(1), json.loads(match.group(2)))
+
+        try:
+            translated = json.loads(reply)
+            for number, translation in translated.items():
+                await deliver(number, translation)
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Segment translation reply could not be parsed: {e}")
     
-    async def simplify_text(self, legal_text: str, page_num: int) -> str:
+    async def simplify_text(
+        self,
+        legal_text: str,
+        page_num: int,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
         """Simplify legal text to simple English"""
+        # The prompt depends on the text alone, which is what the cache is keyed by
         prompt = f"""
-        Simplify this legal land document text (Page {page_num}) to simple, meaningful English:
+        Simplify this legal land document text to simple, meaningful English:
         
         {legal_text}
+        {SIMPLIFICATION_REQUIREMENTS}"""
         
-        Include:
-        1. A short summary for this page
-        2. Key details (owner, land size, survey number, boundaries)
-        3. Explanation of any technical terms
-        4. Use bullet points for clarity
+        return await self._cached_complete(
+            "simplify",
+            legal_text,
+            SIMPLIFIER_ROLE,
+            prompt,
+            temperature=0.3,
+            on_delta=on_delta
+        )
+    
+    async def translate_and_simplify(self, tamil_text: str, page_num: int) -> Tuple[str, str]:
         """
+        Legal English and simple English for a page from one structured
+        response. Falls back to the two-call path when the reply does not
+        validate against PageTranslation.
+        """
+        # Like the other cached prompts, this one depends on the text alone
+        prompt = f"""
+        Translate this Tamil land document text to formal legal English,
+        then rewrite your translation in simple, meaningful English:
         
-        response = await asyncio.to_thread(
-            self.client.chat.completions.create,
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You simplify complex legal documents for common people."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
-        )
+        {tamil_text}
         
-        return response.choices[0].message.content.strip()
-    
+        For legal_english:{TRANSLATION_REQUIREMENTS}
+        For simple_english:{SIMPLIFICATION_REQUIREMENTS}"""
+
+        async def produce() -> str:
+            reply = await self._complete(
+                TRANSLATOR_ROLE, prompt, temperature=0.2, response_format=PAGE_TRANSLATION_FORMAT
+            )
+            # Validate before the reply can be cached
+            PageTranslation.model_validate_json(reply)
+            return reply
+
+        try:
+            reply = await self._cached("translate+simplify", tamil_text, produce)
+            result = PageTranslation.model_validate_json(reply)
+            return result.legal_english.strip(), result.simple_english.strip()
+        except ValidationError as e:
+            logger.warning(f"Combined reply for page {page_num} did not validate, using two calls: {e}")
+
+        legal_english = await self.translate_to_legal_english(tamil_text, page_num)
+        return legal_english, await self.simplify_text(legal_english, page_num)
+
+    def _batch_prompt(self, kind: str, pages: Dict[int, str]) -> Tuple[str, str]:
+        """System prompt and user prompt for several pages in one request"""
+        numbered = json.dumps({str(num): text for num, text in pages.items()}, ensure_ascii=False, indent=2)
+        if kind == "translate":
+            return TRANSLATOR_ROLE, f"""
+        Translate each page of this Tamil land document to formal legal English.
+        Pages are given as a JSON object keyed by page number; translate every page on its own.
+        
+        {numbered}
+        {TRANSLATION_REQUIREMENTS}
+        Return a JSON object mapping every page number to its translation.
+        """
+        return SIMPLIFIER_ROLE, f"""
+        Simplify each page of this legal land document to simple, meaningful English.
+        Pages are given as a JSON object keyed by page number; simplify every page on its own.
+        
+        {numbered}
+        {SIMPLIFICATION_REQUIREMENTS}
+        Return a JSON object mapping every page number to its simplified text.
+        """
+
+    def request_overhead_tokens(self, kind: str) -> int:
+        """Prompt tokens a single-page request spends besides the page text"""
+        system_prompt, prompt = self._batch_prompt(kind, {})
+        return count_tokens(system_prompt, self.model) + count_tokens(prompt, self.model)
+
+    async def complete_pages(self, kind: str, pages: Dict[int, str]) -> Dict[int, str]:
+        """
+        Translate ("translate") or simplify ("simplify") several pages with
+        one request. Cached pages are served from the cache; with the
+        translation memory on, translations go through the segment path
+        shared with single pages. If the reply cannot be mapped back to
+        pages, each page is sent on its own.
+        """
+        results: Dict[int, str] = {}
+        cache_kind = self.cache_kind(kind)
+        keys = {
+            num: translation_cache.make_key(cache_kind, text, self.model, self.PROMPT_VERSION)
+            for num, text in pages.items()
+        }
+        for num, key in keys.items():
+            cached = await translation_cache.get(key)
+            if cached is not None:
+                results[num] = cached
+
+        missing = {num: text for num, text in pages.items() if num not in results}
+        if not missing:
+            return results
+
+        if cache_kind == "translate-segments":
+            # Same segment path (and memory) as pages translated on their own
+            outputs = await self._translate_with_memory(list(missing.values()))
+            for num, output in zip(missing, outputs):
+                results[num] = output
+                await translation_cache.set(keys[num], cache_kind, output)
+            return results
+
+        if len(missing) > 1:
+            system_prompt, prompt = self._batch_prompt(kind, missing)
+            reply = await self._complete(
+                system_prompt,
+                prompt,
+                temperature=0.2 if kind == "translate" else 0.3,
+                response_format={"type": "json_object"}
+            )
+            try:
+                outputs = json.loads(reply)
+                for num in missing:
+                    results[num] = str(outputs[str(num)]).strip()
+                    await translation_cache.set(keys[num], kind, results[num])
+                return results
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Batched {kind} reply could not be used, sending pages one by one: {e}")
+
+        single = self.translate_to_legal_english if kind == "translate" else self.simplify_text
+        outputs = await asyncio.gather(*(single(text, num) for num, text in missing.items()))
+        results.update(zip(missing, outputs))
+        return results
+
     async def create_document_summary(self, pages_data: List[PageData]) -> str:
-        """Create comprehensive summary of all pages"""
-        combined_text = "\n\n".join([
+        """
+        Create comprehensive summary of all pages. Documents too long for
+        one prompt are summarized map-reduce style: page groups are
+        summarized concurrently (each cached on its own content, so an added
+        page only recomputes its group), then the partial summaries are
+        combined in as many reduce rounds as their size requires.
+        """
+        page_texts = [
             f"Page {page.page_number}:\n{page.legal_english}"
             for page in pages_data if page.legal_english
-        ])
+        ]
+        combined_text = "\n\n".join(page_texts)
+
+        if count_tokens(combined_text, self.model) > config.SUMMARY_MAX_INPUT_TOKENS:
+            # Map: summarize groups of consecutive pages
+            sections = []
+            for text in page_texts:
+                sections.extend(split_chunks(text, config.SUMMARY_GROUP_TOKENS, self.model))
+            partials = await self._summarize_groups("summary-map", self._pack(sections))
+
+            # Reduce: merge partial summaries until they fit one final prompt
+            while (
+                len(partials) > 1
+                and count_tokens("\n\n".join(partials), self.model) > config.SUMMARY_MAX_INPUT_TOKENS
+            ):
+                groups = self._pack(partials)
+                if len(groups) == len(partials):
+                    # Every partial fills a group on its own; merge pairs to make progress
+                    groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+                partials = await self._summarize_groups("summary-reduce", groups)
+
+            combined_text = "\n\n".join(
+                f"Part {i + 1}:\n{partial}" for i, partial in enumerate(partials)
+            )
         
         prompt = f"""
         Create a complete summary of this Tamil land document:
@@ -83,14 +540,210 @@ class TranslationService:
         6. Overall document status
         """
         
-        response = await asyncio.to_thread(
-            self.client.chat.completions.create,
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a land document analyst."},
-                {"role": "user", "content": prompt}
-            ],
+        return await self._cached_complete(
+            "summary",
+            combined_text,
+            "You are a land document analyst.",
+            prompt,
             temperature=0.2
         )
+
+    def _pack(self, texts: List[str]) -> List[List[str]]:
+        """Group consecutive texts so each group stays within SUMMARY_GROUP_TOKENS"""
+        groups, current, current_tokens = [], [], 0
+        for text in texts:
+            tokens = count_tokens(text, self.model)
+            if current and current_tokens + tokens > config.SUMMARY_GROUP_TOKENS:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(text)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _summarize_groups(self, kind: str, groups: List[List[str]]) -> List[str]:
+        """Summarize each group concurrently (map), or merge each group's partial summaries (reduce)"""
+        slots = asyncio.Semaphore(config.PAGE_TRANSLATION_CONCURRENCY)
+
+        async def summarize(group: List[str]) -> str:
+            text = "\n\n".join(group)
+            if kind == "summary-map":
+                prompt = f"""
+        Summarize these pages of a Tamil land document. Keep every party, property
+        detail, survey number, boundary, date, registration detail and important clause:
+        
+        {text}
+        """
+            else:
+                prompt = f"""
+        Merge these partial summaries of one Tamil land document into a single summary.
+        Keep every party, property detail, survey number, boundary, date, registration
+        detail and important clause; remove repetition:
         
-        return response.choices[0].message.content.strip()
+        {text}
+        """
+            async with slots:
+                return await self._cached_complete(
+                    kind, text, "You are a land document analyst.", prompt, temperature=0.2
+                )
+
+        return list(await asyncio.gather(*(summarize(group) for group in groups)))
+
+
+class PageBatcher:
+    """
+    Per-document LLM request planner. Pages below LLM_BATCH_SMALL_PAGE_TOKENS
+    are held briefly and packed into one structured request up to
+    LLM_BATCH_MAX_TOKENS / LLM_BATCH_MAX_PAGES; pages above
+    LLM_MAX_PAGE_TOKENS are split into chunks. Every request takes one of
+    the document's `slots`.
+    """
+
+    def __init__(self, service: TranslationService, slots: asyncio.Semaphore):
+        self.service = service
+        self.slots = slots
+        # Requests made, and what batching saved
+        self.stats = {
+            "requests": 0,
+            "batched_pages": 0,
+            "chunked_pages": 0,
+            "requests_saved": 0,
+            "tokens_saved": 0,
+        }
+        # kind -> [(page_num, text, tokens, future)]
+        self._buffers: Dict[str, list] = {"translate": [], "simplify": []}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # Batch requests in flight; held so they are not garbage collected mid-request
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def translate(self, page_num: int, text: str, on_delta: Optional[DeltaCallback] = None) -> str:
+        return await self._run("translate", page_num, text, on_delta)
+
+    async def simplify(self, page_num: int, text: str, on_delta: Optional[DeltaCallback] = None) -> str:
+        return await self._run("simplify", page_num, text, on_delta)
+
+    async def translate_and_simplify(self, page_num: int, text: str) -> Tuple[str, str]:
+        """Combined mode: one structured request per page (oversize pages still go in chunks)"""
+        if config.LLM_BATCH_ENABLED and count_tokens(text, self.service.model) > config.LLM_MAX_PAGE_TOKENS:
+            legal_english = await self.translate(page_num, text)
+            return legal_english, await self.simplify(page_num, legal_english)
+
+        async with self.slots:
+            self.stats["requests"] += 1
+            return await self.service.translate_and_simplify(text, page_num)
+
+    async def _run(
+        self,
+        kind: str,
+        page_num: int,
+        text: str,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
+        if not config.LLM_BATCH_ENABLED:
+            return await self._single(kind, page_num, text, on_delta)
+
+        tokens = count_tokens(text, self.service.model)
+
+        if tokens > config.LLM_MAX_PAGE_TOKENS:
+            chunks = split_chunks(text, config.LLM_MAX_PAGE_TOKENS, self.service.model)
+            self.stats["chunked_pages"] += 1
+            if on_delta:
+                # Streamed chunks run one after another so deltas stay in order
+                outputs = []
+                for i, chunk in enumerate(chunks):
+                    if i:
+                        await on_delta("\n\n")
+                    outputs.append(await self._single(kind, page_num, chunk, on_delta))
+            else:
+                outputs = await asyncio.gather(*(self._single(kind, page_num, chunk) for chunk in chunks))
+            return "\n\n".join(outputs)
+
+        if tokens >= config.LLM_BATCH_SMALL_PAGE_TOKENS:
+            return await self._single(kind, page_num, text, on_delta)
+
+        future = asyncio.get_running_loop().create_future()
+        buffer = self._buffers[kind]
+        buffer.append((page_num, text, tokens, future))
+        if (
+            sum(item[2] for item in buffer) >= config.LLM_BATCH_MAX_TOKENS
+            or len(buffer) >= config.LLM_BATCH_MAX_PAGES
+        ):
+            self._flush(kind)
+        elif kind not in self._timers:
+            self._timers[kind] = asyncio.get_running_loop().call_later(
+                config.LLM_BATCH_WAIT_MS / 1000, self._flush, kind
+            )
+        output = await future
+        if on_delta:
+            await on_delta(output)
+        return output
+
+    async def _single(
+        self,
+        kind: str,
+        page_num: int,
+        text: str,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
+        async with self.slots:
+            self.stats["requests"] += 1
+            if kind == "translate":
+                return await self.service.translate_to_legal_english(text, page_num, on_delta)
+            return await self.service.simplify_text(text, page_num, on_delta)
+
+    def flush(self):
+        """Send whatever is buffered now (e.g. once no more pages are coming)"""
+        for kind in self._buffers:
+            self._flush(kind)
+
+    def _flush(self, kind: str):
+        timer = self._timers.pop(kind, None)
+        if timer is not None:
+            timer.cancel()
+        batch, self._buffers[kind] = self._buffers[kind], []
+        if batch:
+            task = asyncio.create_task(self._send_batch(kind, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def cancel(self):
+        """Drop buffered pages and cancel batch requests (e.g. when the document fails)"""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for buffer in self._buffers.values():
+            for *_, future in buffer:
+                future.cancel()
+            buffer.clear()
+        for task in self._tasks:
+            task.cancel()
+
+    async def _send_batch(self, kind: str, batch: list):
+        if len(batch) == 1:
+            page_num, text, _, future = batch[0]
+            try:
+                output = await self._single(kind, page_num, text)
+                if not future.done():
+                    future.set_result(output)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        try:
+            async with self.slots:
+                self.stats["requests"] += 1
+                outputs = await self.service.complete_pages(
+                    kind, {page_num: text for page_num, text, _, _ in batch}
+                )
+            self.stats["batched_pages"] += len(batch)
+            self.stats["requests_saved"] += len(batch) - 1
+            self.stats["tokens_saved"] += (len(batch) - 1) * self.service.request_overhead_tokens(kind)
+            for page_num, _, _, future in batch:
+                if not future.done():
+                    future.set_result(outputs[page_num])
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
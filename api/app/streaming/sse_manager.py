@@ -3,13 +3,20 @@ from typing import Dict, Set
 import json
 from datetime import datetime
 from app.models.report import SSEEvent, ProcessingStatus
+from app.core.config import config
+from app.repositories.job_repo import ProcessingEventRepository
 import logging
 
 logger = logging.getLogger(__name__)
 
 class SSEManager:
-    def __init__(self):
+    def __init__(self, shared: bool = False):
+        """
+        With `shared`, events travel through MongoDB so that a document
+        processed by a worker process can be streamed from any API process.
+        """
         self.connections: Dict[str, Set[asyncio.Queue]] = {}
+        self.shared = shared
     
     async def subscribe(self, document_id: str) -> asyncio.Queue:
         """Subscribe to SSE events for a document"""
@@ -31,7 +38,7 @@ class SSEManager:
     
     async def send_event(self, document_id: str, event_type: str, data: Dict):
         """Send SSE event to all subscribers"""
-        if document_id not in self.connections:
+        if document_id not in self.connections and not self.shared:
             return
         
         event = SSEEvent(
@@ -42,6 +49,13 @@ class SSEManager:
         )
         
         event_json = f"event: {event_type}\ndata: {event.model_dump_json()}\n\n"
+
+        if self.shared:
+            try:
+                await asyncio.to_thread(ProcessingEventRepository.add, document_id, event_json)
+            except Exception as e:
+                logger.error(f"Error publishing event for {document_id}: {e}")
+            return
         
         dead_queues = []
         for queue in list(self.connections[document_id]):
@@ -57,6 +71,11 @@ class SSEManager:
     
     async def event_generator(self, document_id: str):
         """Generate SSE events for a specific document"""
+        if self.shared:
+            async for event in self._shared_event_generator(document_id):
+                yield event
+            return
+
         queue = await self.subscribe(document_id)
         try:
             while True:
@@ -74,3 +93,42 @@ class SSEManager:
             logger.error(f"Error in event generator for {document_id}: {e}", exc_info=True)
         finally:
             await self.unsubscribe(document_id, queue)
+
+    async def _shared_event_generator(self, document_id: str):
+        """
+        Relay the events stored for a document, from the start of its current
+        run, in sequence order. A number is taken before its event is written,
+        so a gap can be an event still being written by another process: it
+        is waited for (up to SSE_GAP_WAIT_MS) before being skipped.
+        """
+        last_seq = 0
+        idle = 0.0
+        gap_since = None
+        poll_seconds = config.SSE_POLL_MS / 1000
+        try:
+            while True:
+                events = await asyncio.to_thread(ProcessingEventRepository.get_after, document_id, last_seq)
+                relayed = 0
+                for event in events:
+                    if last_seq and event["seq"] != last_seq + 1:
+                        now = asyncio.get_running_loop().time()
+                        gap_since = gap_since or now
+                        if now - gap_since < config.SSE_GAP_WAIT_MS / 1000:
+                            break
+                    gap_since = None
+                    last_seq = event["seq"]
+                    relayed += 1
+                    yield event["event"]
+                if relayed:
+                    idle = 0.0
+                    continue
+
+                await asyncio.sleep(poll_seconds)
+                idle += poll_seconds
+                if idle >= 60.0:
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+        except (asyncio.CancelledError, GeneratorExit) as e:
+            logger.info(f"SSE connection closed for document {document_id}: {type(e).__name__}")
+        except Exception as e:
+            logger.error(f"Error in event generator for {document_id}: {e}", exc_info=True)
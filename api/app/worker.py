@@ -0,0 +1,175 @@
+"""
+Document processing worker.
+
+Leases documents from the MongoDB job queue and runs the processing
+pipeline outside the API processes, so workers can be scaled (and
+redeployed) independently:
+
+    python -m app.worker --concurrency 4
+
+SIGINT/SIGTERM stop the worker from taking new jobs and let running ones
+finish; a job cut short anyway is taken over by another worker once its
+lease expires and continues from the pages already stored.
+"""
+
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+
+from app.core.config import config
+from app.db.session import ensure_indexes
+from app.models.report import ProcessingStatus
+from app.repositories.job_repo import JobRepository
+from app.repositories.report_repo import OriginalFileRepository
+from app.services.ocr_worker import shutdown_ocr_executor
+from app.services.openai_client import close_openai_clients
+from app.services.report_service import DocumentProcessingService
+
+logging.basicConfig(
+    level=logging.INFO if config.DEBUG else logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff before the next attempt of a failed job"""
+    return min(config.JOB_RETRY_MAX_SECONDS, config.JOB_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+
+
+class Worker:
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.service = DocumentProcessingService()
+        self.stopping: asyncio.Event = None
+
+    async def run(self):
+        self.stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopping.set)
+
+        logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+        try:
+            await asyncio.gather(*(self._slot() for _ in range(self.concurrency)))
+        finally:
+            shutdown_ocr_executor()
+            await close_openai_clients()
+            logger.info(f"Worker {self.worker_id} stopped")
+
+    async def _slot(self):
+        """Claim and run jobs one at a time until asked to stop"""
+        while not self.stopping.is_set():
+            job = None
+            try:
+                job = await asyncio.to_thread(
+                    JobRepository.claim, self.worker_id, config.PROCESSING_STALE_SECONDS
+                )
+            except Exception as e:
+                logger.error(f"Claiming a job failed: {str(e)}")
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), config.JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _run_job(self, job: dict):
+        document_id = job["_id"]
+        if job["attempts"] > config.JOB_MAX_ATTEMPTS:
+            # The last attempt's worker died without reporting back
+            await self._fail(job, "Lease expired on the final attempt")
+            return
+
+        logger.info(f"Processing document {document_id} (attempt {job['attempts']})")
+        task = asyncio.create_task(self.service.process_job(job))
+
+        # Renew the lease while the pipeline runs; losing it means another
+        # worker has taken the job over
+        lost = False
+        while not task.done():
+            await asyncio.wait({task}, timeout=config.PROCESSING_HEARTBEAT_SECONDS)
+            if task.done():
+                break
+            try:
+                if not await asyncio.to_thread(
+                    JobRepository.renew, document_id, self.worker_id, config.PROCESSING_STALE_SECONDS
+                ):
+                    lost = True
+                    task.cancel()
+                    break
+            except Exception as e:
+                logger.warning(f"Lease renewal failed for {document_id}: {str(e)}")
+
+        try:
+            await task
+        except asyncio.CancelledError:
+            if lost:
+                logger.warning(f"Lost the lease on {document_id}; abandoning it")
+                return
+            raise
+        except Exception as e:
+            await self._fail(job, str(e))
+            return
+
+        await asyncio.to_thread(JobRepository.complete, document_id, self.worker_id)
+
+    async def _fail(self, job: dict, error: str):
+        """Schedule a retry with backoff, or dead-letter the job"""
+        document_id, attempts = job["_id"], job["attempts"]
+
+        if attempts < config.JOB_MAX_ATTEMPTS:
+            delay = retry_delay(attempts)
+            await asyncio.to_thread(
+                JobRepository.fail,
+                document_id,
+                self.worker_id,
+                error,
+                datetime.utcnow() + timedelta(seconds=delay)
+            )
+            logger.warning(f"Document {document_id} failed (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+            try:
+                await asyncio.to_thread(OriginalFileRepository.update_processing, document_id, "queued")
+            except Exception as e:
+                logger.warning(f"Could not record {document_id} as queued: {str(e)}")
+            await self.service.sse_manager.send_event(
+                document_id,
+                "status_update",
+                {
+                    "status": ProcessingStatus.QUEUED,
+                    "message": f"Retrying in {delay:.0f}s (attempt {attempts + 1} of {config.JOB_MAX_ATTEMPTS})"
+                }
+            )
+            return
+
+        await asyncio.to_thread(JobRepository.fail, document_id, self.worker_id, error, None)
+        logger.error(f"Document {document_id} failed {attempts} times, dead-lettered: {error}")
+        await self.service.report_failure(document_id, error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Document processing worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.WORKER_CONCURRENCY,
+        help="Documents processed at once (default: WORKER_CONCURRENCY)"
+    )
+    args = parser.parse_args()
+
+    config.validate()
+    ensure_indexes()
+    asyncio.run(Worker(args.concurrency).run())
+
+
+if __name__ == "__main__":
+    main()
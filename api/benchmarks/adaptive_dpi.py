@@ -0,0 +1,61 @@
+"""
+Fixed high-DPI OCR against adaptive DPI (fast pass, re-scan when unsure).
+
+For every page of a PDF this reports the OCR time of both modes, whether
+the adaptive pass re-scanned the page, and how closely the adaptive text
+matches the high-DPI text.
+
+    python -m benchmarks.adaptive_dpi path/to/deed.pdf --fast-dpi 150 --min-confidence 75
+"""
+
+import argparse
+import difflib
+import time
+
+from app.core.config import config
+from app.services.ocr_worker import get_pdf_page_count, ocr_pdf_page
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main(pdf_path: str, dpi: int, fast_dpi: int, min_confidence: float, lang: str, max_pages: int):
+    pages = min(get_pdf_page_count(pdf_path), max_pages)
+    fixed_total = adaptive_total = 0.0
+    rescanned = 0
+
+    print(f"{'page':>4} {'fixed s':>8} {'adaptive s':>10} {'rescan':>6} {'conf':>5} {'agreement':>9}")
+    for page_num in range(1, pages + 1):
+        fixed, fixed_seconds = timed(ocr_pdf_page, pdf_path, page_num, dpi, lang)
+        adaptive, adaptive_seconds = timed(
+            ocr_pdf_page, pdf_path, page_num, dpi, lang, False, 0, 0.0, fast_dpi, min_confidence
+        )
+        agreement = difflib.SequenceMatcher(None, fixed.text, adaptive.text).ratio()
+
+        fixed_total += fixed_seconds
+        adaptive_total += adaptive_seconds
+        rescanned += adaptive.rescanned
+        print(
+            f"{page_num:>4} {fixed_seconds:>8.2f} {adaptive_seconds:>10.2f} "
+            f"{'yes' if adaptive.rescanned else 'no':>6} {adaptive.confidence or 0:>5.1f} {agreement:>9.3f}"
+        )
+
+    print(
+        f"total: fixed {fixed_total:.1f}s, adaptive {adaptive_total:.1f}s "
+        f"({100 * (1 - adaptive_total / fixed_total):.0f}% saved), {rescanned}/{pages} re-scanned"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", help="scanned PDF to OCR")
+    parser.add_argument("--dpi", type=int, default=config.OCR_HIGH_DPI)
+    parser.add_argument("--fast-dpi", type=int, default=config.OCR_FAST_DPI)
+    parser.add_argument("--min-confidence", type=float, default=config.OCR_MIN_CONFIDENCE)
+    parser.add_argument("--lang", default=config.TESSERACT_LANG)
+    parser.add_argument("--max-pages", type=int, default=10)
+    args = parser.parse_args()
+    main(args.pdf, args.dpi, args.fast_dpi, args.min_confidence, args.lang, args.max_pages)
@@ -0,0 +1,121 @@
+"""
+AdmissionController under bursty document arrivals.
+
+Documents arrive in bursts (a random number at once from one of
+--tenants tenants, bursts spaced by exponential gaps) and are admitted,
+queued or refused by a fresh AdmissionController; an admitted document
+holds its slot for a random processing time. Reports throughput,
+refusals, the deepest queue and the queue wait and end-to-end latency of
+the documents that were accepted, overall and per tenant.
+
+    python -m benchmarks.admission_burst --bursts 20 --burst-size 15 --gap 2 --service 0.5
+"""
+
+from typing import Dict, List
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from app.core.config import config
+from app.core.scheduler import LANE_INTERACTIVE, parse_weights, scheduling_context
+from app.services.admission import AdmissionController, QueueFullError
+
+
+def summarize(label: str, seconds: List[float]):
+    seconds = sorted(seconds)
+    p95 = seconds[int(0.95 * (len(seconds) - 1))]
+    print(
+        f"{label:>10}: p50={statistics.median(seconds):.2f}s "
+        f"p95={p95:.2f}s max={seconds[-1]:.2f}s"
+    )
+
+
+async def document(
+    controller: AdmissionController,
+    number: int,
+    tenant: str,
+    service: float,
+    waits: Dict[str, List[float]],
+    latencies: List[float],
+    refused: List[int]
+):
+    arrived = time.perf_counter()
+    try:
+        with scheduling_context(tenant, None, LANE_INTERACTIVE):
+            ticket = controller.reserve(f"doc-{number}", 1024 * 1024)
+    except QueueFullError as e:
+        refused.append(e.retry_after)
+        return
+    try:
+        await controller.wait(ticket)
+        waits.setdefault(tenant, []).append(time.perf_counter() - arrived)
+        # Processing time, skewed like real documents (a few long ones)
+        await asyncio.sleep(random.expovariate(1 / service))
+    finally:
+        controller.release(ticket)
+    latencies.append(time.perf_counter() - arrived)
+
+
+async def main(
+    bursts: int, burst_size: int, gap: float, service: float, tenants: int, max_documents: int, max_queued: int
+):
+    controller = AdmissionController(
+        max_documents=max_documents,
+        max_pages=config.MAX_PAGES_IN_FLIGHT,
+        max_queued_documents=max_queued,
+        max_queued_bytes=config.MAX_QUEUED_MB * 1024 * 1024,
+        lane_weights=parse_weights(config.SCHEDULER_LANE_WEIGHTS),
+        tenant_weights=parse_weights(config.SCHEDULER_TENANT_WEIGHTS)
+    )
+    waits: Dict[str, List[float]] = {}
+    latencies: List[float] = []
+    refused: List[int] = []
+    tasks = []
+    deepest = 0
+
+    started = time.perf_counter()
+    number = 0
+    for _ in range(bursts):
+        tenant = f"tenant-{random.randrange(tenants)}"
+        for _ in range(random.randint(1, 2 * burst_size - 1)):
+            tasks.append(asyncio.create_task(
+                document(controller, number, tenant, service, waits, latencies, refused)
+            ))
+            number += 1
+        # Let the burst reach the controller before measuring the queue
+        await asyncio.sleep(0)
+        deepest = max(deepest, len(controller.waiting))
+        await asyncio.sleep(random.expovariate(1 / gap))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{number} documents in {bursts} bursts: {len(latencies)} completed in {elapsed:.1f}s "
+        f"({len(latencies) / elapsed:.2f} documents/s), {len(refused)} refused, deepest queue {deepest}"
+    )
+    if refused:
+        print(f"retry-after: mean={statistics.mean(refused):.0f}s max={max(refused)}s")
+    if latencies:
+        summarize("wait", [wait for tenant_waits in waits.values() for wait in tenant_waits])
+        summarize("latency", latencies)
+        for tenant in sorted(waits):
+            summarize(tenant, waits[tenant])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=15, help="mean documents per burst")
+    parser.add_argument("--gap", type=float, default=2.0, help="mean seconds between bursts")
+    parser.add_argument("--service", type=float, default=0.5, help="mean seconds to process a document")
+    parser.add_argument("--tenants", type=int, default=3, help="tenants the bursts come from")
+    parser.add_argument("--max-documents", type=int, default=config.MAX_CONCURRENT_DOCUMENTS)
+    parser.add_argument("--max-queued", type=int, default=config.MAX_QUEUED_DOCUMENTS)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(main(
+        args.bursts, args.burst_size, args.gap, args.service, args.tenants, args.max_documents, args.max_queued
+    ))
@@ -0,0 +1,79 @@
+"""
+/health latency while documents are being OCR'd.
+
+Measures how long the API takes to answer /health on an idle event loop,
+then again while several copies of a PDF go through the OCR stage, which
+shows whether OCR still blocks request handling.
+
+    python -m benchmarks.health_latency path/to/deed.pdf --documents 4
+"""
+
+from typing import List
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.main import app
+from app.services.ocr_service import OCRService
+from app.services.ocr_worker import shutdown_ocr_executor
+
+
+def summarize(label: str, latencies: List[float]):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{label:>10}: n={len(latencies)} p50={1000 * statistics.median(latencies):.1f}ms "
+        f"p95={1000 * p95:.1f}ms max={1000 * latencies[-1]:.1f}ms"
+    )
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> List[float]:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def ocr_document(ocr: OCRService, pdf_path: str) -> int:
+    pages = 0
+    async for _ in ocr.stream_pages(pdf_path, "pdf"):
+        pages += 1
+    return pages
+
+
+async def main(pdf_path: str, documents: int, idle_seconds: float, interval: float):
+    ocr = OCRService()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        stop = asyncio.Event()
+        idle = asyncio.create_task(probe(client, stop, interval))
+        await asyncio.sleep(idle_seconds)
+        stop.set()
+        summarize("idle", await idle)
+
+        stop = asyncio.Event()
+        busy = asyncio.create_task(probe(client, stop, interval))
+        started = time.perf_counter()
+        pages = await asyncio.gather(*(ocr_document(ocr, pdf_path) for _ in range(documents)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        summarize("during OCR", await busy)
+        print(f"OCR: {sum(pages)} pages in {elapsed:.1f}s across {documents} documents")
+
+    shutdown_ocr_executor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", help="PDF to OCR")
+    parser.add_argument("--documents", type=int, default=4, help="copies OCR'd concurrently")
+    parser.add_argument("--idle-seconds", type=float, default=3.0)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between probes")
+    args = parser.parse_args()
+    asyncio.run(main(args.pdf, args.documents, args.idle_seconds, args.interval))
@@ -0,0 +1,55 @@
+"""
+Per-page OCR time of each backend on the same rendered pages.
+
+Pages are rendered once up front, so only the engine is measured: the
+pytesseract CLI (model reloaded per page) against the resident tesserocr
+engine. Backends that cannot load (e.g. tesserocr not installed) are
+reported and skipped.
+
+    python -m benchmarks.ocr_backends path/to/deed.pdf --pages 5 --dpi 300
+"""
+
+import argparse
+import statistics
+import time
+
+from app.core.config import config
+from app.services.ocr_backends import BACKENDS, get_backend
+from app.services.ocr_worker import get_preprocessor, render_pdf_page
+
+
+def main(pdf_path: str, pages: int, dpi: int, lang: str, repeat: int):
+    images = [get_preprocessor().process(render_pdf_page(pdf_path, n, dpi))[0] for n in range(1, pages + 1)]
+    print(f"{len(images)} pages rendered at {dpi} DPI, lang={lang}")
+
+    for name in BACKENDS:
+        try:
+            backend = get_backend(name, lang)
+        except Exception as e:
+            print(f"{name:>12}: skipped ({e})")
+            continue
+
+        # Warm-up page: loading the engine is a one-off per worker
+        backend.image_to_string(images[0])
+
+        timings = []
+        for _ in range(repeat):
+            for image in images:
+                started = time.perf_counter()
+                backend.image_to_string(image)
+                timings.append(time.perf_counter() - started)
+        print(
+            f"{name:>12}: mean={statistics.mean(timings):.2f}s/page "
+            f"median={statistics.median(timings):.2f}s/page over {len(timings)} runs"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", help="PDF whose pages are OCR'd")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--dpi", type=int, default=config.OCR_HIGH_DPI)
+    parser.add_argument("--lang", default=config.TESSERACT_LANG)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+    main(args.pdf, args.pages, args.dpi, args.lang, args.repeat)
@@ -0,0 +1,136 @@
+"""
+OpenAI calls through the shared rate limiter against a fake endpoint.
+
+The fake endpoint (an in-process httpx transport behind the real OpenAI
+client) accepts at most --server-rps requests per second, answers the
+rest with 429 and a retry-after, and can inject extra 429s at random.
+With --quota, every 429 is an insufficient_quota error, which must fail
+at once instead of being retried. Reports completed and failed calls, the
+429s seen and per-call latency.
+
+    python -m benchmarks.rate_limit_429 --calls 200 --concurrency 40 --client-rpm 540 --server-rps 10
+"""
+
+from collections import deque
+from typing import List
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.services import openai_client
+from app.services.rate_limiter import RateLimiter
+
+
+class FakeEndpoint:
+    def __init__(self, requests_per_second: int, error_rate: float, quota: bool):
+        self.requests_per_second = requests_per_second
+        self.error_rate = error_rate
+        self.quota = quota
+        self.accepted = deque()
+        self.counters = {"requests": 0, "rate_limited": 0}
+
+    def _too_many(self, message: str, code: str, retry_after_ms: int) -> httpx.Response:
+        self.counters["rate_limited"] += 1
+        return httpx.Response(
+            429,
+            headers={"retry-after-ms": str(retry_after_ms)},
+            json={"error": {"message": message, "type": "requests", "code": code}}
+        )
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.counters["requests"] += 1
+        now = time.monotonic()
+        while self.accepted and now - self.accepted[0] > 1.0:
+            self.accepted.popleft()
+
+        if self.quota:
+            return self._too_many("You exceeded your current quota", "insufficient_quota", 0)
+        if len(self.accepted) >= self.requests_per_second:
+            return self._too_many("Rate limit reached", "rate_limit_exceeded", 1000)
+        if random.random() < self.error_rate:
+            return self._too_many("Rate limit reached", "rate_limit_exceeded", 200)
+
+        self.accepted.append(now)
+        # Model latency
+        await asyncio.sleep(random.uniform(0.05, 0.2))
+        body = json.loads(request.content)
+        return httpx.Response(200, json={
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "ok"},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 50, "completion_tokens": 10, "total_tokens": 60}
+        })
+
+
+async def call(number: int, slots: asyncio.Semaphore, latencies: List[float], failures: List[str]):
+    async with slots:
+        started = time.perf_counter()
+        try:
+            await openai_client.chat_completion(
+                messages=[{"role": "user", "content": f"Request {number}"}],
+                model="gpt-4o-mini",
+                temperature=0.2,
+                api_key="benchmark"
+            )
+            latencies.append(time.perf_counter() - started)
+        except Exception as e:
+            failures.append(type(e).__name__)
+
+
+async def main(calls: int, concurrency: int, client_rpm: int, server_rps: int, error_rate: float, quota: bool):
+    endpoint = FakeEndpoint(server_rps, error_rate, quota)
+    openai_client._clients["benchmark"] = AsyncOpenAI(
+        api_key="benchmark",
+        base_url="http://fake-openai/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(endpoint.handle))
+    )
+    # Fresh budget, so earlier runs do not count against this one
+    limiter_db = os.path.join(tempfile.mkdtemp(), "ratelimit.sqlite3")
+    openai_client.rate_limiter = RateLimiter(limiter_db, requests_per_minute=client_rpm, tokens_per_minute=0)
+
+    latencies: List[float] = []
+    failures: List[str] = []
+    slots = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(call(n, slots, latencies, failures) for n in range(calls)))
+    elapsed = time.perf_counter() - started
+    await openai_client.close_openai_clients()
+
+    print(
+        f"{len(latencies)}/{calls} completed, {len(failures)} failed {sorted(set(failures))} "
+        f"in {elapsed:.1f}s ({len(latencies) / elapsed:.1f} calls/s)"
+    )
+    print(f"endpoint: {endpoint.counters['requests']} requests, {endpoint.counters['rate_limited']} answered 429")
+    if latencies:
+        latencies.sort()
+        print(
+            f"latency: p50={statistics.median(latencies):.2f}s "
+            f"p95={latencies[int(0.95 * (len(latencies) - 1))]:.2f}s max={latencies[-1]:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--client-rpm", type=int, default=540, help="OPENAI_RPM_LIMIT of the shared limiter")
+    parser.add_argument("--server-rps", type=int, default=10, help="requests per second the endpoint accepts")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of extra random 429s")
+    parser.add_argument("--quota", action="store_true", help="answer every call with insufficient_quota")
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.concurrency, args.client_rpm, args.server_rps, args.error_rate, args.quota))
@@ -0,0 +1,96 @@
+"""
+two_call against combined translation mode on the same pages.
+
+Pages come from a text file, separated by form feeds (pdftotext output)
+or by lines holding only "---". Each mode translates and simplifies every
+page with the cache bypassed, and the script reports wall time, OpenAI
+requests and the tokens they used. Calls the real API (OPENAI_API_KEY).
+
+    pdftotext -layout deed.pdf pages.txt
+    python -m benchmarks.translation_modes pages.txt --concurrency 4
+"""
+
+from typing import List
+import argparse
+import asyncio
+import re
+import time
+
+from app.core.cache import LRUCache
+from app.core.config import config
+from app.services import openai_client
+from app.services.translation_cache import translation_cache
+from app.services.translation_service import PageBatcher, TranslationService
+
+
+class UsageCounter:
+    """Counts the requests and tokens going through create_with_retries"""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._create = openai_client.create_with_retries
+
+    async def __call__(self, api_key, estimated_tokens, **params):
+        response = await self._create(api_key, estimated_tokens, **params)
+        self.requests += 1
+        if response.usage is not None:
+            self.prompt_tokens += response.usage.prompt_tokens
+            self.completion_tokens += response.usage.completion_tokens
+        return response
+
+
+def read_pages(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    pages = re.split(r"\f|^---$", text, flags=re.MULTILINE)
+    return [page.strip() for page in pages if page.strip()]
+
+
+async def run_mode(mode: str, pages: List[str], concurrency: int):
+    service = TranslationService(api_key=config.OPENAI_API_KEY, model=config.OPENAI_MODEL)
+    batcher = PageBatcher(service, asyncio.Semaphore(concurrency))
+    counter = UsageCounter()
+    openai_client.create_with_retries = counter
+    # Nothing may come from an earlier run or from the other mode
+    translation_cache.memory = LRUCache(max_bytes=0)
+
+    async def page(num: int, text: str):
+        if mode == "combined":
+            return await batcher.translate_and_simplify(num, text)
+        legal_english = await batcher.translate(num, text)
+        return legal_english, await batcher.simplify(num, legal_english)
+
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(page(num, text) for num, text in enumerate(pages, 1)))
+    finally:
+        openai_client.create_with_retries = counter._create
+    elapsed = time.perf_counter() - started
+
+    simple_chars = sum(len(simple) for _, simple in results)
+    print(
+        f"{mode:>9}: {elapsed:.1f}s, {counter.requests} requests, "
+        f"{counter.prompt_tokens} prompt + {counter.completion_tokens} completion tokens, "
+        f"{simple_chars} chars of simple English"
+    )
+
+
+async def main(path: str, concurrency: int):
+    pages = read_pages(path)
+    translation_cache.persistent = False
+    # One page per request, so both modes are measured page by page
+    config.LLM_BATCH_ENABLED = False
+    print(f"{len(pages)} pages, model {config.OPENAI_MODEL}, {concurrency} pages at a time")
+    for mode in ("two_call", "combined"):
+        await run_mode(mode, pages, concurrency)
+    await openai_client.close_openai_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pages", help="text file with one page per form-feed (or ---) section")
+    parser.add_argument("--concurrency", type=int, default=config.PAGE_TRANSLATION_CONCURRENCY)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.concurrency))
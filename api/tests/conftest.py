@@ -0,0 +1,12 @@
+"""
+Unit tests run without MongoDB or OpenAI: the settings below only have to
+let the app modules import (the Mongo client connects lazily).
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("MONGO_URI", "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=500")
+os.environ.setdefault("MONGO_DB_NAME", "report_valuation_test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("OPENAI_RATE_LIMIT_DB", os.path.join(tempfile.mkdtemp(), "ratelimit.sqlite3"))
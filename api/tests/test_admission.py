@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from app.core.scheduler import LANE_BULK, LANE_INTERACTIVE, scheduling_context
+from app.services.admission import AdmissionController, QueueFullError
+
+MB = 1024 * 1024
+
+
+def controller(max_documents=1, max_queued_documents=3, max_queued_bytes=10 * MB, lane_weights=None):
+    return AdmissionController(max_documents, 4, max_queued_documents, max_queued_bytes, lane_weights)
+
+
+def reserve(admission, document_id, user="u", lane=LANE_INTERACTIVE, size=MB):
+    with scheduling_context(user, None, lane):
+        return admission.reserve(document_id, size)
+
+
+def test_admits_up_to_capacity_then_queues():
+    admission = controller(max_documents=2)
+    first, second, third = (reserve(admission, f"d{n}") for n in range(3))
+    assert first.admitted and second.admitted and not third.admitted
+    assert admission.position(third) == 1
+    assert admission.queued_bytes == MB
+
+    admission.release(first)
+    assert third.admitted
+    assert admission.queued_bytes == 0
+    assert admission.running == {"d1", "d2"}
+
+
+def test_refuses_beyond_queue_limits():
+    admission = controller(max_queued_documents=2)
+    for n in range(3):
+        reserve(admission, f"d{n}")
+    with pytest.raises(QueueFullError) as e:
+        reserve(admission, "d3")
+    assert e.value.retry_after > 0
+    assert admission.counters["rejected"] == 1
+
+
+def test_refuses_when_queued_bytes_exceed_budget():
+    admission = controller(max_queued_bytes=3 * MB)
+    reserve(admission, "running")
+    reserve(admission, "small", size=2 * MB)
+    with pytest.raises(QueueFullError):
+        reserve(admission, "large", size=2 * MB)
+
+
+def test_batch_check_counts_every_document():
+    admission = controller(max_queued_documents=2)
+    reserve(admission, "running")
+    admission.check(3 * MB, count=2)
+    with pytest.raises(QueueFullError):
+        admission.check(3 * MB, count=3)
+
+
+def test_checked_reserve_skips_limits():
+    admission = controller(max_queued_documents=0)
+    reserve(admission, "running")
+    ticket = admission.reserve("batch", MB, checked=True)
+    assert not ticket.admitted
+
+
+def test_waiting_documents_are_admitted_fairly():
+    admission = controller(max_queued_documents=10)
+    running = reserve(admission, "running", user="a")
+    backlog = [reserve(admission, f"a{n}", user="a") for n in range(3)]
+    other = reserve(admission, "b0", user="b")
+    # The later upload of another tenant does not wait behind the backlog
+    # of a tenant that already has a document running
+    assert admission.position(other) == 1
+    assert [admission.position(t) for t in backlog] == [2, 3, 4]
+
+    order = []
+    current = running
+    while current:
+        admission.release(current)
+        current = next((t for t in backlog + [other] if t.admitted and t.document_id not in order), None)
+        if current:
+            order.append(current.document_id)
+    assert order == ["b0", "a0", "a1", "a2"]
+
+
+def test_interactive_lane_admitted_before_bulk_backlog():
+    admission = controller(max_queued_documents=10, lane_weights={LANE_INTERACTIVE: 4, LANE_BULK: 1})
+    reserve(admission, "running", lane=LANE_BULK)
+    bulk = [reserve(admission, f"bulk{n}", lane=LANE_BULK) for n in range(3)]
+    uploads = [reserve(admission, f"upload{n}", user="v", lane=LANE_INTERACTIVE) for n in range(2)]
+    assert [admission.position(t) for t in uploads] == [1, 2]
+    assert [admission.position(t) for t in bulk] == [3, 4, 5]
+
+
+def test_released_waiting_ticket_leaves_queue():
+    admission = controller()
+    running = reserve(admission, "running")
+    first, second = reserve(admission, "d1"), reserve(admission, "d2")
+    admission.release(first)
+    assert "d1" not in admission.waiting and admission.position(second) == 1
+    admission.release(running)
+    assert second.admitted and admission.queued_bytes == 0
+
+
+def test_wait_reports_positions_until_admitted():
+    async def scenario():
+        admission = controller()
+        running = reserve(admission, "running")
+        ticket = reserve(admission, "queued")
+        positions = []
+
+        async def on_position(position):
+            positions.append(position)
+
+        waiting = asyncio.create_task(admission.wait(ticket, on_position))
+        await asyncio.sleep(0)
+        admission.release(running)
+        await asyncio.wait_for(waiting, 1)
+        assert positions == [1]
+        assert ticket.admitted
+
+    asyncio.run(scenario())
@@ -0,0 +1,56 @@
+from pymongo.errors import DuplicateKeyError
+
+from app.repositories import job_repo
+from app.repositories.job_repo import JobRepository
+
+
+class FakeJobs:
+    def __init__(self, active: bool):
+        self.active = active
+        self.updates = []
+
+    def update_one(self, filter, update, upsert=False):
+        if upsert and self.active:
+            raise DuplicateKeyError("E11000 duplicate key")
+        self.updates.append(update["$set"])
+
+
+class FakeFlows:
+    def __init__(self):
+        self.tags = {}
+
+    def find_one(self, filter):
+        return None
+
+    def find_one_and_update(self, filter, update, upsert=False, return_document=None):
+        self.tags[filter["_id"]] = self.tags.get(filter["_id"], 0.0) + 1.0
+        return {"tag": self.tags[filter["_id"]]}
+
+
+class FakeEvents:
+    def delete_many(self, filter):
+        pass
+
+
+def enqueue(monkeypatch, active):
+    jobs, flows = FakeJobs(active), FakeFlows()
+    monkeypatch.setattr(job_repo, "processing_jobs", jobs)
+    monkeypatch.setattr(job_repo, "processing_job_flows", flows)
+    monkeypatch.setattr(job_repo, "processing_events", FakeEvents())
+    queued = JobRepository.enqueue("doc", "/tmp/doc.pdf", "pdf", scheduling={"user_id": "u", "lane": "interactive"})
+    return queued, jobs, flows
+
+
+def test_rejected_enqueue_leaves_the_flow_tag_alone(monkeypatch):
+    queued, jobs, flows = enqueue(monkeypatch, active=True)
+    assert not queued
+    assert flows.tags == {}
+
+
+def test_queued_job_takes_the_next_tag_of_its_flow(monkeypatch):
+    queued, jobs, flows = enqueue(monkeypatch, active=False)
+    assert queued
+    # Waits at the virtual time until its own tag is allocated
+    assert jobs.updates[0]["fair_tag"] == 0.0
+    assert jobs.updates[1] == {"fair_tag": 0.0}
+    assert list(flows.tags.values()) == [1.0]
@@ -0,0 +1,20 @@
+from app.services.ocr_cache import OCRCache, OCRCacheRepository
+from app.services.ocr_worker import OCRPage
+
+
+def persisted(monkeypatch, page):
+    cache = OCRCache()
+    cache.persistent = True
+    monkeypatch.setattr(OCRCacheRepository, "get", staticmethod(lambda key: {"_id": key, "page": page}))
+    return cache
+
+
+def test_legacy_fields_are_dropped(monkeypatch):
+    cache = persisted(monkeypatch, {"text": "பத்திரம்", "source": "ocr", "image_hash": "ff", "duplicate_of": None})
+    page = OCRPage(3, **cache.get("key"))
+    assert (page.text, page.image_hash) == ("பத்திரம்", "ff")
+
+
+def test_legacy_duplicate_entries_are_misses(monkeypatch):
+    cache = persisted(monkeypatch, {"text": "", "source": "duplicate", "duplicate_of": "ff"})
+    assert cache.get("key") is None
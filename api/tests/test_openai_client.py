@@ -0,0 +1,177 @@
+import asyncio
+import json
+
+import httpx
+import openai
+import pytest
+from openai import AsyncOpenAI
+
+from app.core.config import config
+from app.services import openai_client
+from app.services.llm import LLMService
+from app.services.rate_limiter import RateLimiter
+
+
+class FakeEndpoint:
+    """Chat completions endpoint answering with the queued responses, then 200s"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        if self.responses:
+            return self.responses.pop(0)
+        reply = f"reply to {body['messages'][-1]['content']}"
+        if body.get("stream"):
+            first, rest = reply.split(" ", 1)
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content="".join(
+                    "data: " + json.dumps({
+                        "id": "chatcmpl-test",
+                        "object": "chat.completion.chunk",
+                        "created": 0,
+                        "model": body["model"],
+                        "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]
+                    }) + "\n\n"
+                    for word in (first, " " + rest)
+                ) + "data: [DONE]\n\n"
+            )
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"  {reply} "},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 5, "total_tokens": 10}
+        })
+
+
+def error(status: int, code: str = "rate_limit_exceeded") -> httpx.Response:
+    return httpx.Response(
+        status,
+        headers={"retry-after-ms": "10"},
+        json={"error": {"message": "try again", "type": "requests", "code": code}}
+    )
+
+
+@pytest.fixture
+def endpoint(monkeypatch, tmp_path):
+    """Route the configured API key to a fake endpoint with a fresh rate limit budget"""
+    endpoint = FakeEndpoint()
+    monkeypatch.setitem(openai_client._clients, config.OPENAI_API_KEY, AsyncOpenAI(
+        api_key=config.OPENAI_API_KEY,
+        base_url="http://fake-openai/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(endpoint.handle))
+    ))
+    monkeypatch.setattr(openai_client, "rate_limiter", RateLimiter(str(tmp_path / "limits.sqlite3"), 6000, 0))
+    monkeypatch.setattr(config, "OPENAI_MAX_RETRIES", 2)
+    # No tokenizer download in unit tests
+    monkeypatch.setattr(openai_client, "count_message_tokens", lambda messages, model: 10)
+    return endpoint
+
+
+def create(**params):
+    return openai_client.create_with_retries(
+        None, 10, model="gpt-4o-mini", messages=[{"role": "user", "content": "hi"}], **params
+    )
+
+
+def test_client_is_shared_and_pooled(monkeypatch):
+    monkeypatch.setattr(config, "OPENAI_MAX_CONNECTIONS", 7)
+    monkeypatch.setattr(config, "OPENAI_MAX_KEEPALIVE_CONNECTIONS", 3)
+    monkeypatch.setattr(config, "OPENAI_KEEPALIVE_SECONDS", 12.0)
+    monkeypatch.setattr(openai_client, "_clients", {})
+
+    client = openai_client.get_openai_client("pool-test")
+    assert openai_client.get_openai_client("pool-test") is client
+    assert openai_client.get_openai_client("other-key") is not client
+    # Retries belong to create_with_retries, not the SDK
+    assert client.max_retries == 0
+    pool = client._client._transport._pool
+    assert (pool._max_connections, pool._max_keepalive_connections, pool._keepalive_expiry) == (7, 3, 12.0)
+
+    asyncio.run(openai_client.close_openai_clients())
+    assert not openai_client._clients
+    assert client._client.is_closed
+
+
+def test_retries_rate_limits_until_success(endpoint):
+    endpoint.responses = [error(429), error(500)]
+    response = asyncio.run(create())
+    assert response.choices[0].message.content.strip() == "reply to hi"
+    assert len(endpoint.requests) == 3
+
+
+def test_gives_up_after_max_retries(endpoint):
+    endpoint.responses = [error(500)] * 5
+    with pytest.raises(openai.InternalServerError):
+        asyncio.run(create())
+    assert len(endpoint.requests) == config.OPENAI_MAX_RETRIES + 1
+
+
+def test_client_errors_are_not_retried(endpoint):
+    endpoint.responses = [error(400, "invalid_request")]
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(create())
+    assert len(endpoint.requests) == 1
+
+
+def test_chat_completion_returns_stripped_text(endpoint):
+    text = asyncio.run(openai_client.chat_completion(
+        [{"role": "user", "content": "deed"}], "gpt-4o-mini", 0.2
+    ))
+    assert text == "reply to deed"
+    assert endpoint.requests[0]["temperature"] == 0.2
+
+
+def test_summarize_is_async(endpoint):
+    assert asyncio.run(LLMService().summarize("a long deed")) == "reply to a long deed"
+    assert endpoint.requests[0]["model"] == "gpt-4o-mini"
+
+
+def test_insufficient_quota_fails_at_once(endpoint):
+    endpoint.responses = [error(429, "insufficient_quota")]
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(create())
+    assert len(endpoint.requests) == 1
+    # Nobody else is paused for it either
+    assert openai_client.rate_limiter.try_acquire(0) == 0
+
+
+def test_stream_holds_its_scheduler_slot_until_closed(endpoint, monkeypatch):
+    monkeypatch.setattr(openai_client.llm_scheduler, "capacity", 1)
+
+    async def scenario():
+        stream = openai_client.stream_chat_completion([{"role": "user", "content": "a"}], "gpt-4o-mini", 0.2)
+        assert await stream.__anext__() == "reply"
+        other = asyncio.create_task(
+            openai_client.chat_completion([{"role": "user", "content": "b"}], "gpt-4o-mini", 0.2)
+        )
+        await asyncio.sleep(0.05)
+        # The open stream still occupies the only slot
+        assert not other.done()
+        await stream.aclose()
+        assert await asyncio.wait_for(other, 1) == "reply to b"
+        assert openai_client.llm_scheduler.in_use == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_yields_the_whole_reply(endpoint):
+    async def read():
+        return [delta async for delta in openai_client.stream_chat_completion(
+            [{"role": "user", "content": "deed"}], "gpt-4o-mini", 0.2
+        )]
+
+    assert "".join(asyncio.run(read())) == "reply to deed"
+    assert openai_client.llm_scheduler.in_use == 0
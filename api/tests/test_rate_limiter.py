@@ -0,0 +1,80 @@
+import pytest
+
+from app.services import rate_limiter as module
+from app.services.rate_limiter import RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(module.time, "time", clock)
+    return clock
+
+
+def limiter(tmp_path, requests_per_minute=0, tokens_per_minute=0):
+    return RateLimiter(str(tmp_path / "ratelimit.sqlite3"), requests_per_minute, tokens_per_minute)
+
+
+def test_request_bucket_empties_and_refills(tmp_path, clock):
+    bucket = limiter(tmp_path, requests_per_minute=60)
+    for _ in range(60):
+        assert bucket.try_acquire(0) == 0
+    # Empty: one request refills in a second
+    assert bucket.try_acquire(0) == pytest.approx(1.0)
+    clock.now += 1
+    assert bucket.try_acquire(0) == 0
+
+
+def test_token_bucket_waits_for_enough_tokens(tmp_path, clock):
+    bucket = limiter(tmp_path, tokens_per_minute=600)
+    assert bucket.try_acquire(500) == 0
+    # 100 left; 300 more take 30 seconds to refill at 10 tokens/s
+    assert bucket.try_acquire(400) == pytest.approx(30.0)
+    clock.now += 30
+    assert bucket.try_acquire(400) == 0
+
+
+def test_request_larger_than_bucket_waits_for_a_full_bucket(tmp_path, clock):
+    bucket = limiter(tmp_path, tokens_per_minute=600)
+    assert bucket.try_acquire(1000) == 0
+    assert bucket.try_acquire(1) == pytest.approx(0.1)
+
+
+def test_adjust_settles_the_estimate(tmp_path, clock):
+    bucket = limiter(tmp_path, tokens_per_minute=600)
+    bucket.try_acquire(600)
+    # The call used 300 tokens fewer than estimated
+    bucket.adjust(-300)
+    assert bucket.try_acquire(300) == 0
+    bucket.adjust(60)
+    assert bucket.try_acquire(1) == pytest.approx(6.1)
+
+
+def test_pause_holds_every_caller(tmp_path, clock):
+    bucket = limiter(tmp_path, requests_per_minute=60)
+    bucket.pause(5)
+    # A shorter pause does not cut the longer one short
+    bucket.pause(1)
+    assert bucket.try_acquire(0) == pytest.approx(5.0)
+    clock.now += 5
+    assert bucket.try_acquire(0) == 0
+
+
+def test_buckets_are_shared_through_the_file(tmp_path, clock):
+    first = limiter(tmp_path, requests_per_minute=1)
+    second = limiter(tmp_path, requests_per_minute=1)
+    assert first.try_acquire(0) == 0
+    assert second.try_acquire(0) > 0
+
+
+def test_zero_limits_disable_the_limiter(tmp_path, clock):
+    bucket = limiter(tmp_path)
+    assert all(bucket.try_acquire(10 ** 6) == 0 for _ in range(5))
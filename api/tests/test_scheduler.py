@@ -0,0 +1,105 @@
+import asyncio
+
+from app.core.scheduler import (
+    LANE_BULK, LANE_INTERACTIVE, FairOrder, FairScheduler, Tenant, parse_weights, scheduling_context
+)
+
+
+def test_parse_weights():
+    assert parse_weights("interactive=4, bulk=1,,broken=") == {"interactive": 4.0, "bulk": 1.0}
+    assert parse_weights("") == {}
+
+
+def test_weight_combines_lane_and_tenant():
+    order = FairOrder({LANE_INTERACTIVE: 4}, {"SBI": 2, "u2": 3})
+    assert order.weight(LANE_INTERACTIVE, Tenant("u1", "SBI")) == 8
+    # A bank weight wins over the user's own
+    assert order.weight(LANE_BULK, Tenant("u2", "SBI")) == 2
+    assert order.weight(LANE_BULK, Tenant("u2")) == 3
+    assert order.weight(LANE_BULK, Tenant("u3")) == 1
+
+
+def test_start_tags_follow_weights():
+    order = FairOrder({LANE_INTERACTIVE: 4, LANE_BULK: 1}, {})
+    bulk = [order.start_tag(LANE_BULK, Tenant("a")) for _ in range(3)]
+    interactive = [order.start_tag(LANE_INTERACTIVE, Tenant("b")) for _ in range(3)]
+    assert bulk == [0.0, 1.0, 2.0]
+    assert interactive == [0.0, 0.25, 0.5]
+
+
+def test_idle_flow_starts_at_virtual_time():
+    order = FairOrder({}, {})
+    order.start_tag(LANE_BULK, Tenant("a"))
+    order.started(5.0)
+    # No credit for the time the flow was idle
+    assert order.start_tag(LANE_BULK, Tenant("a")) == 5.0
+
+
+async def _grant_order(scheduler, requests):
+    """Queue `requests` (user, lane) behind a held slot; return the order they are granted in"""
+    granted = []
+
+    async def request(user, lane):
+        with scheduling_context(user, None, lane):
+            async with scheduler.slot():
+                granted.append(user)
+                await asyncio.sleep(0)
+
+    blocker = await scheduler.acquire()
+    tasks = [asyncio.create_task(request(user, lane)) for user, lane in requests]
+    await asyncio.sleep(0)
+    scheduler.release(blocker)
+    await asyncio.gather(*tasks)
+    return granted
+
+
+def test_backlog_does_not_starve_other_tenant():
+    scheduler = FairScheduler("test", 1, {}, {})
+    granted = asyncio.run(_grant_order(scheduler, [("a", LANE_BULK)] * 4 + [("b", LANE_BULK)] * 2))
+    assert granted == ["a", "b", "a", "b", "a", "a"]
+
+
+def test_interactive_lane_gets_larger_share():
+    scheduler = FairScheduler("test", 1, {LANE_INTERACTIVE: 3, LANE_BULK: 1}, {})
+    granted = asyncio.run(_grant_order(
+        scheduler, [("bulk", LANE_BULK)] * 4 + [("live", LANE_INTERACTIVE)] * 6
+    ))
+    assert granted[:5] == ["bulk", "live", "live", "live", "bulk"]
+    assert scheduler.in_use == 0
+
+
+def test_tenant_limit_caps_slots():
+    async def scenario():
+        scheduler = FairScheduler("test", 3, {}, {}, tenant_limit=1)
+        with scheduling_context("a", None, LANE_BULK):
+            first = await scheduler.acquire()
+            second = asyncio.create_task(scheduler.acquire())
+        with scheduling_context("b", None, LANE_BULK):
+            other = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        # "b" gets a free slot; "a" waits although one is still free
+        assert other.done() and not second.done()
+        scheduler.release(first)
+        await asyncio.sleep(0)
+        assert second.done()
+        scheduler.release(second.result())
+        scheduler.release(other.result())
+        assert scheduler.in_use == 0 and not scheduler.tenant_in_use
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_hold_a_slot():
+    async def scenario():
+        scheduler = FairScheduler("test", 1, {}, {})
+        held = await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        scheduler.release(held)
+        assert scheduler.in_use == 0
+        # The slot is free for the next caller
+        scheduler.release(await asyncio.wait_for(scheduler.acquire(), 1))
+
+    asyncio.run(scenario())
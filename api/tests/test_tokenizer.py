@@ -0,0 +1,35 @@
+import pytest
+import requests
+import tiktoken
+
+from app.services import tokenizer
+from app.services.translation_service import split_chunks
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    """tiktoken as on a host that cannot download encoding files"""
+    def unavailable(name):
+        raise requests.ConnectionError("no network")
+
+    monkeypatch.setattr(tokenizer, "_encodings", {})
+    monkeypatch.setattr(tiktoken, "encoding_for_model", unavailable)
+    monkeypatch.setattr(tiktoken, "get_encoding", unavailable)
+
+
+def test_counts_fall_back_to_characters(offline):
+    assert tokenizer.count_tokens("பட்டா எண் 12", "gpt-4o-mini") == 6
+    assert tokenizer.count_message_tokens([{"role": "user", "content": "abcd"}], "gpt-4o-mini") == 2 + 4 + 3
+
+
+def test_fallback_is_kept_for_the_model(offline, monkeypatch):
+    tokenizer.get_encoding("gpt-4o-mini")
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda name: pytest.fail("retried the download"))
+    assert isinstance(tokenizer.get_encoding("gpt-4o-mini"), tokenizer.CharEstimateEncoding)
+
+
+def test_oversize_lines_are_still_chunked(offline):
+    line = "சர்வே எண் 101/2 " * 10
+    chunks = split_chunks(line, 20, "gpt-4o-mini")
+    assert "".join(chunks) == line
+    assert all(tokenizer.count_tokens(chunk, "gpt-4o-mini") <= 20 for chunk in chunks)
@@ -0,0 +1,52 @@
+import pytest
+
+from app.core.config import config
+from app.services import translation_memory as tm
+from app.services.translation_memory import TranslationMemory, join_segments, split_segments
+
+CLAUSE = "The vendor hereby sells the property described in the schedule below."
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    monkeypatch.setattr(config, "TRANSLATION_MEMORY_MIN_SEGMENT_CHARS", 20)
+    # Nothing is written to MongoDB
+    monkeypatch.setattr(tm.TranslationMemoryRepository, "add", staticmethod(lambda *args: None))
+    return TranslationMemory(max_entries=2)
+
+
+def test_lookup_matches_normalized_text(memory):
+    memory.add(CLAUSE, "translated", "model")
+    assert memory.lookup(CLAUSE) == "translated"
+    assert memory.lookup("  The vendor hereby sells the property\ndescribed in the schedule below. ") == "translated"
+
+
+def test_lookup_misses_a_clause_that_differs(memory):
+    memory.add(CLAUSE, "translated", "model")
+    assert memory.lookup(CLAUSE.replace("below", "above")) is None
+
+
+def test_short_segments_are_neither_stored_nor_looked_up(memory):
+    memory.add("Page 1", "Page 1", "model")
+    assert not memory.entries
+    assert memory.lookup("Page 1") is None
+
+
+def test_least_recently_used_entry_is_evicted(memory):
+    first, second, third = (f"{CLAUSE} Clause {n}." for n in range(3))
+    memory.add(first, "one", "model")
+    memory.add(second, "two", "model")
+    # A hit keeps the entry
+    assert memory.lookup(first) == "one"
+    memory.add(third, "three", "model")
+    assert memory.lookup(second) is None
+    assert memory.lookup(first) == "one" and memory.lookup(third) == "three"
+
+
+def test_segments_round_trip_paragraphs():
+    text = "First clause. Second clause;  third\nclause.\n\nNext paragraph."
+    segments = split_segments(text)
+    assert [s.text for s in segments] == ["First clause.", "Second clause;", "third clause.", "Next paragraph."]
+    assert join_segments(segments, [s.text for s in segments]) == (
+        "First clause. Second clause; third clause.\n\nNext paragraph."
+    )
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app import worker
+from app.core.config import config
+
+
+class FakeService:
+    def __init__(self):
+        self.events = []
+        self.failures = []
+        self.sse_manager = self
+
+    async def send_event(self, document_id, event, data):
+        self.events.append((event, data["status"]))
+
+    async def report_failure(self, document_id, error):
+        self.failures.append(error)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record the job and document updates _fail makes"""
+    calls = []
+    monkeypatch.setattr(worker.JobRepository, "fail", staticmethod(
+        lambda document_id, worker_id, error, retry_at: calls.append(("job", retry_at is not None))
+    ))
+    monkeypatch.setattr(worker.OriginalFileRepository, "update_processing", staticmethod(
+        lambda document_id, status: calls.append(("document", status))
+    ))
+    monkeypatch.setattr(config, "JOB_MAX_ATTEMPTS", 3)
+    return calls
+
+
+def fail(attempts):
+    job_worker = worker.Worker.__new__(worker.Worker)
+    job_worker.worker_id = "test"
+    job_worker.service = FakeService()
+    asyncio.run(job_worker._fail({"_id": "doc", "attempts": attempts}, "boom"))
+    return job_worker.service
+
+
+def test_retryable_failure_requeues_without_reporting_failure(calls):
+    service = fail(attempts=1)
+    assert calls == [("job", True), ("document", "queued")]
+    assert service.events == [("status_update", "queued")]
+    assert service.failures == []
+
+
+def test_last_attempt_is_dead_lettered_and_reported(calls):
+    service = fail(attempts=3)
+    assert calls == [("job", False)]
+    assert service.events == []
+    assert service.failures == ["boom"]